@@ -0,0 +1,85 @@
+import math
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для запросов к API.
+    После failure_threshold ошибок подряд запросы прекращаются
+    на base_delay секунд, при повторных срабатываниях пауза удваивается
+    до max_delay. По истечении паузы пропускается один пробный запрос:
+    успех закрывает предохранитель, ошибка снова открывает его.
+    """
+
+    def __init__(self, failure_threshold=5, base_delay=30, max_delay=600,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_until = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Можно ли сейчас выполнить запрос."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() >= self._opened_until:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        """Запрос прошёл: предохранитель закрывается."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.trips = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Запрос не прошёл: после порога предохранитель открывается."""
+        with self._lock:
+            self.failures += 1
+            if (self.state == HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                self._open()
+
+    def _open(self):
+        self.trips += 1
+        delay = min(self.max_delay, self.base_delay * 2 ** (self.trips - 1))
+        self.state = OPEN
+        self._opened_until = self.clock() + delay
+        self._probe_in_flight = False
+
+    def retry_in(self):
+        """Целое число секунд до пробного запроса."""
+        with self._lock:
+            if self.state == CLOSED:
+                return 0
+            return max(1, math.ceil(self._opened_until - self.clock()))
+
+    def stats(self):
+        """Состояние предохранителя для мониторинга."""
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'trips': self.trips,
+            'rejected': self.rejected,
+            'retry_in': self.retry_in(),
+        }
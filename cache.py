@@ -0,0 +1,107 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+
+# current_date меняется в каждом ответе, поэтому в хеш тела не входит.
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*[^,}\s]*')
+
+
+class CacheEntry:
+    """Последний ответ API для одного токена."""
+
+    __slots__ = ('etag', 'last_modified', 'digest', 'payload')
+
+    def __init__(self, etag, last_modified, digest, payload):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.payload = payload
+
+
+def content_digest(content):
+    """Короткий хеш тела ответа без current_date, None если тела нет."""
+    if not content:
+        return None
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.blake2b(
+        CURRENT_DATE.sub(b'', content), digest_size=16
+    ).digest()
+
+
+class ResponseCache:
+    """
+    Кеш ответов API с вытеснением давно не используемых записей (LRU).
+    Запись ищется только по токену: from_date сдвигается после каждого
+    изменения, а ETag и хеш тела остаются верными и для нового from_date.
+    Пока у подписчика ничего не меняется, курсор стоит на месте, и
+    повторные ответы распознаются как неизменившиеся. На токен хранится
+    одна запись, поэтому размер кеша ограничен числом подписчиков и maxsize.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, token):
+        """Запись для токена или None."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                self._entries.move_to_end(token)
+            return entry
+
+    def validators(self, token):
+        """Заголовки условного запроса для сохранённого ответа."""
+        entry = self.lookup(token)
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def not_modified(self, token, digest=None):
+        """
+        Возвращает сохранённый ответ, если он не изменился.
+        Без digest (ответ 304) достаточно наличия записи.
+        """
+        entry = self.lookup(token)
+        unchanged = entry is not None and (
+            digest is None or entry.digest == digest
+        )
+        with self._lock:
+            if unchanged:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry.payload if unchanged else None
+
+    def store(self, token, headers, digest, payload):
+        """Сохраняет ответ и вытесняет самые старые записи."""
+        entry = CacheEntry(
+            headers.get('ETag'),
+            headers.get('Last-Modified'),
+            digest,
+            payload,
+        )
+        with self._lock:
+            self._entries[token] = entry
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def forget(self, token):
+        """Удаляет запись токена: следующий ответ будет считаться новым."""
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def __len__(self):
+        return len(self._entries)
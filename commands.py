@@ -0,0 +1,279 @@
+import logging
+import queue
+import threading
+
+import telegram
+
+
+logger = logging.getLogger(__name__)
+
+HELP = (
+    'Команды:\n'
+    '/status - последние известные статусы домашек'
+)
+SUBSCRIBE_HELP = (
+    '\n/subscribe <токен Практикума> - подписаться на уведомления\n'
+    '/unsubscribe - отписаться'
+)
+REFRESH_HELP = '\n/refresh - запросить статусы у Практикума сейчас'
+
+STATUS_LABELS = {
+    'reviewing': 'на проверке',
+    'approved': 'принято',
+    'rejected': 'с замечаниями',
+}
+
+
+class Markup(str):
+    """Текст ответа, уже размеченный под parse_mode: не экранируется."""
+
+
+def mask_token(token):
+    """Токен для ответа в чат: только последние четыре символа."""
+    return f'…{token[-4:]}'
+
+
+class CommandHandler:
+    """
+    Ответы на команды пользователей.
+    Статус берётся из последнего известного состояния подписчика,
+    без запроса к API: state_of(token) возвращает SubscriberState или None.
+    Новые подписки складываются в очередь new_tokens, откуда их забирает
+    основной цикл, чтобы поставить в расписание.
+    /subscribe и /unsubscribe доступны, только если реестр хранится
+    в файле: иначе подписка пропала бы при перезапуске.
+    refresh(token) - свежие домашки из API для команды /refresh,
+    None - команда отключена.
+    escape экранирует текст ответов под parse_mode уведомлений:
+    в /status подставляется последнее уведомление, уже размеченное.
+    """
+
+    def __init__(self, registry, state_of, refresh=None, escape=str):
+        self.registry = registry
+        self.state_of = state_of
+        self.refresh_statuses = refresh
+        self.escape = escape
+        self.new_tokens = queue.SimpleQueue()
+        self.help_text = HELP
+        self.commands = {
+            '/start': self.help,
+            '/help': self.help,
+            '/status': self.status,
+        }
+        if registry.path is not None:
+            self.help_text += SUBSCRIBE_HELP
+            self.commands['/subscribe'] = self.subscribe
+            self.commands['/unsubscribe'] = self.unsubscribe
+        if refresh is not None:
+            self.help_text += REFRESH_HELP
+            self.commands['/refresh'] = self.refresh
+
+    def dispatch(self, chat_id, text):
+        """Текст ответа на сообщение или None, если это не команда."""
+        if not text or not text.startswith('/'):
+            return None
+        command, _, argument = text.strip().partition(' ')
+        handler = self.commands.get(command.split('@')[0].lower())
+        if handler is None:
+            reply = f'Неизвестная команда {command}.\n\n{self.help_text}'
+        else:
+            reply = handler(str(chat_id), argument.strip())
+        if isinstance(reply, Markup):
+            return reply
+        return self.escape(reply)
+
+    def tokens_for(self, chat_id):
+        """Токены, уведомления по которым приходят в чат."""
+        return [
+            subscription.token for subscription in list(self.registry)
+            if str(subscription.chat_id) == chat_id
+        ]
+
+    def help(self, chat_id, argument):
+        """Список команд."""
+        return self.help_text
+
+    def status(self, chat_id, argument):
+        """Последние известные статусы по всем подпискам чата."""
+        tokens = self.tokens_for(chat_id)
+        if not tokens:
+            if '/subscribe' not in self.commands:
+                return 'Вы не подписаны.'
+            return (
+                'Вы не подписаны. Отправьте '
+                '/subscribe <токен Практикума>.'
+            )
+        return Markup('\n\n'.join(
+            self.describe(token, len(tokens) > 1) for token in tokens
+        ))
+
+    def describe(self, token, with_token):
+        """Сводка по одному подписчику, размеченная под parse_mode."""
+        prefix = f'Токен {mask_token(token)}: ' if with_token else ''
+        state = self.state_of(token)
+        if state is None or not state.statuses:
+            return Markup(self.escape(
+                f'{prefix}статусы ещё не получены, опрос скоро будет.'
+            ))
+        counts = {}
+        for status in state.statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        summary = ', '.join(
+            f'{STATUS_LABELS.get(status, status)}: {count}'
+            for status, count in sorted(counts.items())
+        )
+        lines = [self.escape(f'{prefix}домашки - {summary}.')]
+        if state.last_message:
+            lines.append(
+                self.escape('Последнее уведомление: ') + state.last_message
+            )
+        return Markup('\n'.join(lines))
+
+    def refresh(self, chat_id, argument):
+        """Статусы прямо из API, если с прошлого опроса что-то изменилось."""
+        tokens = self.tokens_for(chat_id)
+        if not tokens:
+            return self.status(chat_id, argument)
+        return Markup('\n\n'.join(
+            self.describe_fresh(token, len(tokens) > 1) for token in tokens
+        ))
+
+    def describe_fresh(self, token, with_token):
+        """Изменения домашек одного подписчика с прошлого опроса."""
+        prefix = f'Токен {mask_token(token)}: ' if with_token else ''
+        try:
+            homeworks = self.refresh_statuses(token)
+        except Exception as error:
+            logger.warning(f'Не удалось обновить статусы: {error}')
+            return Markup(self.escape(
+                f'{prefix}Практикум сейчас не отвечает, попробуйте позже.'
+            ))
+        if not homeworks:
+            return Markup(
+                self.escape(f'{prefix}новых изменений нет.\n')
+                + self.describe(token, False)
+            )
+        return Markup(self.escape(prefix + '\n'.join(
+            f'"{homework.get("homework_name")}": '
+            f'{STATUS_LABELS.get(homework.get("status"), "статус неизвестен")}'
+            for homework in homeworks
+        )))
+
+    def subscribe(self, chat_id, token):
+        """Подписывает чат на уведомления по токену."""
+        if not token:
+            return 'Укажите токен: /subscribe <токен Практикума>.'
+        subscription = self.registry.get(token)
+        if subscription is not None and str(subscription.chat_id) == chat_id:
+            return 'Вы уже подписаны на этот токен.'
+        if subscription is not None:
+            logger.warning(
+                f'Чат {chat_id} пытается подписаться на токен '
+                f'{mask_token(token)} другого чата'
+            )
+            return (
+                'Этот токен уже подписан на другой чат. Отпишитесь там '
+                'командой /unsubscribe и повторите подписку.'
+            )
+        self.registry.add(token, int(chat_id))
+        self.registry.save()
+        self.new_tokens.put(token)
+        logger.info(f'Новая подписка чата {chat_id}')
+        return (
+            'Подписка оформлена. Первый опрос - в течение нескольких секунд, '
+            'дальше сообщу, когда статус домашки изменится. '
+            'Сообщение с токеном лучше удалить из чата.'
+        )
+
+    def unsubscribe(self, chat_id, argument):
+        """Отписывает чат от всех его токенов."""
+        tokens = self.tokens_for(chat_id)
+        if not tokens:
+            return 'Вы не подписаны.'
+        for token in tokens:
+            self.registry.remove(token)
+        self.registry.save()
+        logger.info(f'Чат {chat_id} отписался')
+        return 'Подписка отменена.'
+
+    def drain_new(self):
+        """Забирает токены новых подписок."""
+        tokens = []
+        while True:
+            try:
+                tokens.append(self.new_tokens.get_nowait())
+            except queue.Empty:
+                return tokens
+
+
+class UpdateListener:
+    """
+    Приём команд через getUpdates (long polling) в фоновом потоке.
+    На каждую команду поток отвечает сразу.
+    У потока свой экземпляр бота: долгий запрос getUpdates не занимает
+    соединение, через которое уходят уведомления. Ответы уходят
+    с тем же parse_mode, под который их разметил обработчик.
+    """
+
+    def __init__(self, bot, handler, timeout=30, error_delay=5,
+                 parse_mode=None):
+        self.bot = bot
+        self.parse_mode = parse_mode
+        self.handler = handler
+        self.timeout = timeout
+        self.error_delay = error_delay
+        self.offset = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """Один запрос getUpdates и ответы на полученные команды."""
+        updates = self.bot.get_updates(
+            offset=self.offset,
+            timeout=self.timeout,
+            allowed_updates=['message'],
+        )
+        for update in updates:
+            self.offset = update.update_id + 1
+            message = update.message
+            if message is None:
+                continue
+            reply = self.handler.dispatch(message.chat_id, message.text)
+            if reply is None:
+                continue
+            try:
+                if self.parse_mode:
+                    self.bot.send_message(
+                        message.chat_id, reply, parse_mode=self.parse_mode
+                    )
+                else:
+                    self.bot.send_message(message.chat_id, reply)
+            except telegram.error.TelegramError as error:
+                logger.error(f'Не удалось ответить на команду: {error}')
+        return len(updates)
+
+    def run(self):
+        """Получает обновления до вызова stop()."""
+        while not self._stopped.is_set():
+            try:
+                self.poll_once()
+            except telegram.error.Conflict as error:
+                logger.error(f'getUpdates недоступен: {error}')
+                self._stopped.wait(self.error_delay * 6)
+            except Exception as error:
+                logger.warning(f'Ошибка получения обновлений: {error}')
+                self._stopped.wait(self.error_delay)
+
+    def start(self):
+        """Запускает поток получения обновлений."""
+        self._thread = threading.Thread(
+            target=self.run, name='updates', daemon=True
+        )
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout=None):
+        """Останавливает поток после текущего запроса."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,61 @@
+import logging
+import math
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class CursorManager:
+    """
+    Курсор from_date подписчика по current_date из ответов API.
+    current_date проверяется: не число или время далеко в будущем
+    не сдвигают курсор, поэтому следующий запрос не уйдёт с from_date=None
+    и не перескочит обновления. Курсор отстаёт от current_date на overlap
+    секунд, чтобы расхождение часов не теряло обновления на границе;
+    повторы из этого окна отсекаются словарём отправленных статусов.
+    Курсор только растёт.
+    """
+
+    def __init__(self, overlap=60, max_skew=86400, initial_window=7889229,
+                 clock=time.time):
+        self.overlap = overlap
+        self.max_skew = max_skew
+        self.initial_window = initial_window
+        self.clock = clock
+
+    def initial(self):
+        """Курсор нового подписчика: initial_window секунд назад."""
+        return int(self.clock()) - self.initial_window
+
+    def restore(self, cursor):
+        """Сохранённый курсор или начальный, если он испорчен."""
+        if not isinstance(cursor, int) or isinstance(cursor, bool):
+            return self.initial()
+        return cursor
+
+    def validate(self, current_date):
+        """current_date как целое число или None, если оно неверное."""
+        if isinstance(current_date, bool):
+            return None
+        if isinstance(current_date, str) and current_date.isdigit():
+            current_date = int(current_date)
+        if not isinstance(current_date, (int, float)):
+            return None
+        if not math.isfinite(current_date):
+            return None
+        if current_date > self.clock() + self.max_skew:
+            return None
+        return int(current_date)
+
+    def advance(self, cursor, current_date):
+        """Новый курсор после ответа с current_date."""
+        cursor = self.restore(cursor)
+        current = self.validate(current_date)
+        if current is None:
+            logger.warning(
+                f'Неверный current_date в ответе API: {current_date!r}, '
+                f'курсор не сдвигается'
+            )
+            return cursor
+        return max(cursor, current - self.overlap)
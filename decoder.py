@@ -0,0 +1,45 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+BACKENDS = {'json': json.loads}
+if orjson is not None:
+    BACKENDS['orjson'] = orjson.loads
+
+
+def get_loads(backend='auto'):
+    """
+    Функция разбора JSON по имени бэкенда.
+    'auto' - orjson, если он установлен, иначе стандартный json.
+    """
+    if backend == 'auto':
+        backend = 'orjson' if 'orjson' in BACKENDS else 'json'
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f'Неизвестный или неустановленный JSON-бэкенд: {backend}'
+        ) from None
+
+
+class JsonDecoder:
+    """
+    Разбор тела ответа API выбранным бэкендом.
+    Тело берётся из response.content; если его нет, используется
+    response.json(). Лишние поля домашек отбрасывает compact_answer,
+    когда строит из ответа записи Homework.
+    """
+
+    def __init__(self, backend='auto'):
+        self.loads = get_loads(backend)
+
+    def decode(self, response):
+        """Разбирает ответ; ошибки разбора - ValueError."""
+        content = getattr(response, 'content', None)
+        if isinstance(content, (bytes, str)):
+            return self.loads(content)
+        return response.json()
@@ -0,0 +1,163 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS sent (
+        key BLOB PRIMARY KEY,
+        sent_at REAL NOT NULL
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS sent_at_idx ON sent (sent_at)',
+)
+
+
+def dedup_key(token, homework_id, status, date_updated):
+    """
+    Ключ уведомления: подписчик, домашка, статус и время его смены.
+    Хранится только 16-байтовый хеш, без токена в открытом виде.
+    """
+    raw = '\x1f'.join(
+        str(part) for part in (token, homework_id, status, date_updated)
+    )
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+
+class BloomFilter:
+    """
+    Фильтр Блума над 16-байтовыми ключами.
+    Отрицательный ответ точный, положительный - с долей ошибок error_rate.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        ))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        first = int.from_bytes(key[:8], 'big')
+        second = int.from_bytes(key[8:16], 'big') | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, key):
+        """Добавляет ключ."""
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class DedupIndex:
+    """
+    Индекс отправленных уведомлений в SQLite с фильтром Блума в памяти.
+    Большинство новых ключей отсекается фильтром без запроса к базе.
+    Записи старше ttl секунд и самые старые сверх capacity удаляются,
+    поэтому индекс ограничен и по времени, и по размеру.
+    """
+
+    def __init__(self, path=':memory:', ttl=7889229, capacity=1000000,
+                 error_rate=0.01, clock=time.time):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._added = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        if path != ':memory:':
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+        self.prune()
+
+    def __contains__(self, key):
+        if key is None:
+            return False
+        with self._lock:
+            if key not in self._bloom:
+                self.misses += 1
+                return False
+            row = self._connection.execute(
+                'SELECT sent_at FROM sent WHERE key = ?', (key,)
+            ).fetchone()
+        found = row is not None and row[0] > self.clock() - self.ttl
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def add_many(self, keys):
+        """Отмечает ключи как отправленные одной транзакцией."""
+        keys = [key for key in keys if key is not None]
+        if not keys:
+            return
+        now = self.clock()
+        with self._lock:
+            self._connection.execute('BEGIN')
+            try:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO sent (key, sent_at) '
+                    'VALUES (?, ?)',
+                    [(key, now) for key in keys],
+                )
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+            for key in keys:
+                self._bloom.add(key)
+            self._added += len(keys)
+            overflow = self._added > max(1, self.capacity // 10)
+        if overflow:
+            self.prune()
+
+    def prune(self):
+        """
+        Удаляет устаревшие и лишние записи и перестраивает фильтр.
+        Из фильтра Блума нельзя удалить отдельный ключ.
+        """
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM sent WHERE sent_at <= ?',
+                (self.clock() - self.ttl,),
+            )
+            self._connection.execute(
+                'DELETE FROM sent WHERE key IN ('
+                'SELECT key FROM sent ORDER BY sent_at DESC '
+                'LIMIT -1 OFFSET ?)',
+                (self.capacity,),
+            )
+            bloom = BloomFilter(self.capacity, self.error_rate)
+            for (key,) in self._connection.execute('SELECT key FROM sent'):
+                bloom.add(key)
+            self._bloom = bloom
+            self._added = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM sent'
+            ).fetchone()[0]
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
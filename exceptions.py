@@ -32,3 +32,15 @@ class HomeworkListIsEmpty(Exception):
     """Апи вернул пустой список."""
 
     pass
+
+
+class ApiRequestFailed(Exception):
+    """Запрос к API не выполнен."""
+
+    pass
+
+
+class CircuitOpenException(Exception):
+    """Запросы к API временно приостановлены предохранителем."""
+
+    pass
@@ -0,0 +1,243 @@
+"""
+Локальная замена Telegram Bot API для проверки отправки без сети.
+
+Запуск:
+    python fake_telegram.py --port 8081
+Бот направляется на заглушку переменной окружения:
+    TELEGRAM_API_URL=http://127.0.0.1:8081/bot
+Статистика доставки: GET http://127.0.0.1:8081/stats
+Входящее сообщение от пользователя:
+    POST http://127.0.0.1:8081/push {"chat_id": 1, "text": "/status"}
+"""
+import argparse
+import itertools
+import json
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class FakeTelegram:
+    """
+    Учёт доставленных сообщений и лимиты Telegram.
+    Не больше global_rate сообщений в секунду на бота
+    и одного сообщения в chat_interval секунд на чат.
+    """
+
+    def __init__(self, global_rate=30, chat_interval=1.0,
+                 clock=time.monotonic):
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.clock = clock
+        self.started = clock()
+        self.delivered = defaultdict(list)
+        self.rejected = 0
+        self._recent = deque()
+        self._last_sent = {}
+        self._message_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._updates = []
+        self._update_ids = itertools.count(1)
+        self._new_update = threading.Condition(self._lock)
+
+    def retry_after(self, chat_id, now):
+        """Сколько секунд подождать перед отправкой в чат, 0 - можно сейчас."""
+        while self._recent and now - self._recent[0] >= 1:
+            self._recent.popleft()
+        wait = 0
+        if len(self._recent) >= self.global_rate:
+            wait = 1 - (now - self._recent[0])
+        last = self._last_sent.get(chat_id)
+        if last is not None:
+            wait = max(wait, self.chat_interval - (now - last))
+        return wait
+
+    def send(self, chat_id, text):
+        """Доставляет сообщение или возвращает паузу из RetryAfter."""
+        with self._lock:
+            now = self.clock()
+            wait = self.retry_after(chat_id, now)
+            if wait > 0:
+                self.rejected += 1
+                return None, max(1, math.ceil(wait))
+            self._recent.append(now)
+            self._last_sent[chat_id] = now
+            self.delivered[chat_id].append(text)
+            return next(self._message_ids), 0
+
+    def push_message(self, chat_id, text):
+        """Входящее сообщение пользователя для getUpdates."""
+        with self._new_update:
+            update_id = next(self._update_ids)
+            self._updates.append({
+                'update_id': update_id,
+                'message': {
+                    'message_id': next(self._message_ids),
+                    'date': int(time.time()),
+                    'chat': {'id': int(chat_id), 'type': 'private'},
+                    'text': text,
+                },
+            })
+            self._new_update.notify_all()
+            return update_id
+
+    def get_updates(self, offset=0, timeout=0):
+        """
+        Обновления с update_id не меньше offset.
+        Как и Telegram, ждёт новых обновлений до timeout секунд
+        и забывает подтверждённые offset'ом.
+        """
+        deadline = self.clock() + timeout
+        with self._new_update:
+            self._updates = [
+                update for update in self._updates
+                if update['update_id'] >= offset
+            ]
+            while not self._updates:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    break
+                self._new_update.wait(remaining)
+            return list(self._updates)
+
+    def stats(self):
+        """Доставленные и отклонённые сообщения, сообщений в секунду."""
+        with self._lock:
+            delivered = sum(len(texts) for texts in self.delivered.values())
+            elapsed = max(self.clock() - self.started, 1e-9)
+            return {
+                'delivered': delivered,
+                'rejected': self.rejected,
+                'chats': len(self.delivered),
+                'per_second': delivered / elapsed,
+            }
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """Методы Bot API, которые использует бот: getMe и sendMessage."""
+
+    protocol_version = 'HTTP/1.1'
+    telegram = None
+
+    def do_GET(self):
+        """Статистика доставки."""
+        if urlsplit(self.path).path == '/stats':
+            return self.reply(HTTPStatus.OK, self.telegram.stats())
+        return self.reply(HTTPStatus.NOT_FOUND, {
+            'ok': False, 'error_code': 404, 'description': 'Not Found',
+        })
+
+    def do_POST(self):
+        """Вызов метода /bot<token>/<method>."""
+        method = urlsplit(self.path).path.rsplit('/', 1)[-1]
+        params = self.read_params()
+        if method == 'getMe':
+            return self.ok({
+                'id': 1, 'is_bot': True, 'first_name': 'fake',
+                'username': 'fake_bot',
+            })
+        if method == 'getUpdates':
+            return self.ok(self.telegram.get_updates(
+                int(params.get('offset') or 0),
+                float(params.get('timeout') or 0),
+            ))
+        if method == 'push':
+            return self.ok(self.telegram.push_message(
+                params['chat_id'], params['text']
+            ))
+        if method != 'sendMessage':
+            return self.reply(HTTPStatus.NOT_FOUND, {
+                'ok': False, 'error_code': 404, 'description': 'Not Found',
+            })
+        chat_id = params.get('chat_id')
+        text = params.get('text')
+        if chat_id is None or not text:
+            return self.reply(HTTPStatus.BAD_REQUEST, {
+                'ok': False, 'error_code': 400,
+                'description': 'Bad Request: message text is empty',
+            })
+        message_id, retry_after = self.telegram.send(str(chat_id), text)
+        if message_id is None:
+            return self.reply(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {retry_after}',
+                'parameters': {'retry_after': retry_after},
+            })
+        return self.ok({
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(chat_id), 'type': 'private'},
+            'text': text,
+        })
+
+    def read_params(self):
+        """Параметры из json или form-urlencoded тела запроса."""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if self.headers.get('Content-Type', '').startswith(
+                'application/json'):
+            return json.loads(body or b'{}')
+        return dict(parse_qsl(body.decode()))
+
+    def ok(self, result):
+        """Успешный ответ Bot API."""
+        return self.reply(HTTPStatus.OK, {'ok': True, 'result': result})
+
+    def reply(self, status, data):
+        """Отправляет json-ответ."""
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Запросы не логируются."""
+
+
+def make_server(telegram, host='127.0.0.1', port=0):
+    """Создаёт сервер заглушки; port=0 - любой свободный порт."""
+    handler = type(
+        'BoundFakeTelegramHandler',
+        (FakeTelegramHandler,),
+        {'telegram': telegram},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def base_url(server):
+    """Адрес для TELEGRAM_API_URL."""
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}/bot'
+
+
+def main(argv=None):
+    """Запускает заглушку до прерывания."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--global-rate', type=int, default=30)
+    parser.add_argument('--chat-interval', type=float, default=1.0)
+    args = parser.parse_args(argv)
+    server = make_server(
+        FakeTelegram(args.global_rate, args.chat_interval),
+        args.host,
+        args.port,
+    )
+    print(f'Заглушка Bot API: {base_url(server)}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
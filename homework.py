@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import logging.config
 import os
@@ -5,19 +6,62 @@ import sys
 import time
 from http import HTTPStatus
 
+from breaker import CircuitBreaker
+
+from cache import ResponseCache, content_digest
+
+from commands import CommandHandler, UpdateListener
+
+from cursor import CursorManager
+
+from decoder import JsonDecoder
+
+from dedup import DedupIndex, dedup_key
+
 from dotenv import load_dotenv
 
 import exceptions as ex
 
+from lease import Lease
+
+from lifecycle import GracefulShutdown
+
 import loggerconfig as log
 
+import metrics
+
+from models import (
+    Homework, Notification, StatusUpdate, SubscriberState, Subscription,
+    compact_answer,
+)
+
+from outbox import Outbox
+
+from pipeline import AsyncPipeline
+
+from ratelimit import HostRateLimiter, parse_host_rates
+
 import requests
 
+from scheduler import PollScheduler
+
+from sharding import HashRing, Supervisor, worker_name
+
+from singleflight import SingleFlight
+
+from state import StateStore
+
+from subscriptions import RegistryWatcher, SubscriptionRegistry
+
 import telegram
 
+from templates import DEFAULT_LOCALE, MessageRenderer
+
+import transport
+
 
 logging.config.dictConfig(log.LOGGING_CONFIG)
-logger = logging.getLogger(__name__)
+logger = logging.getLogger('homework')
 
 
 load_dotenv()
@@ -26,12 +70,58 @@ load_dotenv()
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+TELEGRAM_COMMANDS = os.getenv('TELEGRAM_COMMANDS', '0') == '1'
+UPDATES_TIMEOUT = int(os.getenv('UPDATES_TIMEOUT', 30))
+SUBSCRIPTIONS_FILE = os.getenv('SUBSCRIPTIONS_FILE')
+SUBSCRIPTIONS_SYNC = int(os.getenv('SUBSCRIPTIONS_SYNC', 10))
+WORKERS = int(os.getenv('WORKERS', 1))
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 32))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 0))
+STATE_DB = os.getenv('STATE_DB', ':memory:')
+DEDUP_CAPACITY = int(os.getenv('DEDUP_CAPACITY', 1000000))
+LEASE_DB = os.getenv('LEASE_DB')
+LEASE_TTL = int(os.getenv('LEASE_TTL', 60))
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 10))
+API_HOST_RATE_LIMITS = parse_host_rates(os.getenv('API_HOST_RATE_LIMITS'))
+TELEGRAM_RATE_LIMIT = float(os.getenv('TELEGRAM_RATE_LIMIT', 30))
+TELEGRAM_CHAT_INTERVAL = float(os.getenv('TELEGRAM_CHAT_INTERVAL', 1))
+SEND_MAX_ATTEMPTS = int(os.getenv('SEND_MAX_ATTEMPTS', 5))
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', 5))
+BREAKER_BASE_DELAY = int(os.getenv('BREAKER_BASE_DELAY', 30))
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 10000))
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+MESSAGE_LOCALE = os.getenv('MESSAGE_LOCALE', DEFAULT_LOCALE)
+MESSAGE_PARSE_MODE = os.getenv('MESSAGE_PARSE_MODE') or None
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', 4096))
+API_TIMEOUT = (
+    float(os.getenv('API_CONNECT_TIMEOUT', 5)),
+    float(os.getenv('API_READ_TIMEOUT', 30)),
+)
 
 RETRY_PERIOD = 600
+MIN_POLL_PERIOD = int(os.getenv('MIN_POLL_PERIOD', 120))
+MAX_POLL_PERIOD = int(os.getenv('MAX_POLL_PERIOD', 3600))
+IDLE_POLLS_BEFORE_BACKOFF = int(os.getenv('IDLE_POLLS_BEFORE_BACKOFF', 3))
+REFRESH_FRESHNESS = int(os.getenv('REFRESH_FRESHNESS', 30))
+CURSOR_OVERLAP = int(os.getenv('CURSOR_OVERLAP', 60))
+SHUTDOWN_TIMEOUT = int(os.getenv('SHUTDOWN_TIMEOUT', 20))
 THREE_MONTHS = 7889229
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+TELEGRAM_MESSAGE_LIMIT = 4096
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+json_decoder = JsonDecoder(JSON_BACKEND)
+cursors = CursorManager(CURSOR_OVERLAP, initial_window=THREE_MONTHS)
+# Номер процесса-воркера; None - процесс не запущен супервизором.
+WORKER_INDEX = None
+
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -39,46 +129,128 @@ HOMEWORK_VERDICTS = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+renderer = MessageRenderer(
+    MESSAGE_LOCALE,
+    MESSAGE_PARSE_MODE,
+    verdicts=HOMEWORK_VERDICTS,
+    cache_size=MESSAGE_CACHE_SIZE,
+)
+
 
 def check_tokens():
     """
     Функция проверяет доступность переменных окружения.
     При отсуствии хотя бы одного значения, прерывает работу программы.
+    Если задан файл подписок, токен и чат берутся из него.
     """
     logger.info('Начали проверку переменных окружения')
+    if SUBSCRIPTIONS_FILE:
+        return bool(TELEGRAM_TOKEN)
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
+@metrics.instrument('send_message')
 def send_message(bot, message):
-    """Отправляет статус домашки от бота пользователю."""
+    """
+    Отправляет статус домашки от бота пользователю.
+    Для Notification чат берётся из сообщения, иначе - TELEGRAM_CHAT_ID.
+    Возвращает False, если сообщение не отправлено. RetryAfter
+    пробрасывается дальше, чтобы очередь отправки выдержала паузу.
+    """
     logger.info('Пытаемся отправить сообщение')
+    chat_id = getattr(message, 'chat_id', TELEGRAM_CHAT_ID)
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logger.debug(f'Сообщение отправлено успешно: {message}')
+        if MESSAGE_PARSE_MODE:
+            bot.send_message(
+                chat_id, str(message), parse_mode=MESSAGE_PARSE_MODE
+            )
+        else:
+            bot.send_message(chat_id, str(message))
+        logger.debug(
+            f'Сообщение отправлено успешно в чат {chat_id}, '
+            f'символов: {len(str(message))}'
+        )
+    except telegram.error.RetryAfter as error:
+        logger.warning(f'Telegram просит подождать: {error}')
+        raise
     except Exception as error:
         logger.error(
-            f'Сообщение не отправлено! Проверьте id чата: {TELEGRAM_CHAT_ID}. '
+            f'Сообщение не отправлено! Проверьте id чата: {chat_id}. '
             f'Ошибка: {error}'
         )
+        return False
+    return True
 
 
 def get_api_answer(timestamp):
     """Функция делает запрос к АПИ и возвращает ответ в формате json."""
+    return request_statuses(PRACTICUM_TOKEN, timestamp)
+
+
+async def send_message_async(pipeline, bot, message):
+    """Асинхронная версия send_message для конвейера."""
+    return await pipeline.call(send_message, bot, message)
+
+
+async def get_api_answer_async(pipeline, token, timestamp, flights=None):
+    """
+    Асинхронная версия get_api_answer для подписчика с токеном token.
+    Возвращает пару (ответ, изменился ли он), как fetch_statuses.
+    С flights одновременные запросы одного токена объединяются.
+    """
+    if flights is None:
+        return await pipeline.call(fetch_statuses, token, timestamp)
+    return await pipeline.call(
+        flights.do, (token, timestamp), fetch_statuses, token, timestamp
+    )
+
+
+def request_statuses(token, timestamp):
+    """Запрашивает статусы домашек подписчика с токеном token."""
+    answer, _ = fetch_statuses(token, timestamp)
+    return answer
+
+
+@metrics.instrument('fetch_statuses')
+def fetch_statuses(token, timestamp):
+    """
+    Запрашивает статусы домашек с учётом кеша ответов.
+    Возвращает пару (ответ, изменился ли он с прошлого запроса).
+    Домашки в ответе - записи Homework: ответ живёт в кеше до
+    следующего изменения, и словари из JSON в нём не держатся.
+    """
+    headers = {'Authorization': f'OAuth {token}'}
+    headers.update(response_cache.validators(token))
     payload = {'from_date': timestamp}
 
     try:
         logger.info(f'Делаем запрос к эндпоинту: {ENDPOINT}')
-        response = requests.get(ENDPOINT, headers=HEADERS, params=payload)
+        response = transport.get(ENDPOINT, headers=headers, params=payload)
     except requests.RequestException as error:
-        message = f'Код ответа API: {response.status_code}. Ошибка: {error}'
-        raise requests.RequestException(message)
+        raise ex.ApiRequestFailed(
+            f'Не удалось выполнить запрос к {ENDPOINT}: {error}'
+        ) from error
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        answer = response_cache.not_modified(token)
+        if answer is not None:
+            return answer, False
     if response.status_code != HTTPStatus.OK:
         raise ex.WrongAnswerStatus(
             f'Сервер вернул некорректный статус: {response.status_code}'
         )
-    return response.json()
+    digest = content_digest(getattr(response, 'content', None))
+    if digest is not None:
+        answer = response_cache.not_modified(token, digest)
+        if answer is not None:
+            return answer, False
+    answer = compact_answer(json_decoder.decode(response))
+    response_cache.store(
+        token, getattr(response, 'headers', {}), digest, answer
+    )
+    return answer, True
 
 
+@metrics.instrument('check_response')
 def check_response(response):
     """Функция проверяет корректность данных ответа сервера."""
     logger.info('Проверяем формат ответа сервера')
@@ -90,9 +262,10 @@ def check_response(response):
         logger.debug('В данный момент обновлений нет')
     if not isinstance(response.get('homeworks'), list):
         raise TypeError('Тип домашних работ не в виде списка')
-    return response['homeworks']
+    return [Homework.from_api(homework) for homework in response['homeworks']]
 
 
+@metrics.instrument('parse_status')
 def parse_status(homework):
     """Функция извлекает статус последней домашки из ответа сервера."""
     logger.info('Получаем статус последней домашки')
@@ -104,52 +277,735 @@ def parse_status(homework):
     status = homework.get('status')
     if status not in HOMEWORK_VERDICTS:
         raise ex.UnknownStatusException('Неизвестный статус домашки')
-    verdict = HOMEWORK_VERDICTS[status]
-    return (f'Изменился статус проверки работы "{homework_name}". {verdict}')
+    return renderer.status(homework_name, status)
+
+
+def load_subscriptions():
+    """
+    Загружает реестр подписчиков.
+    Без файла подписок реестр состоит из одного подписчика из окружения.
+    """
+    if SUBSCRIPTIONS_FILE:
+        return SubscriptionRegistry.load(SUBSCRIPTIONS_FILE)
+    return SubscriptionRegistry(
+        subscriptions=[Subscription(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)]
+    )
+
+
+def shard_subscriptions(registry, index, workers):
+    """
+    Подписки, которые опрашивает воркер index из workers.
+    Распределение по консистентному хешу токена: у каждого подписчика
+    ровно один воркер, поэтому уведомления не дублируются.
+    """
+    ring = HashRing(worker_name(number) for number in range(workers))
+    name = worker_name(index)
+    return registry.select(lambda token: ring.owner(token) == name)
+
+
+def owns(token):
+    """Опрашивает ли этот процесс подписчика с токеном token."""
+    if WORKER_INDEX is None:
+        return True
+    ring = HashRing(worker_name(number) for number in range(WORKERS))
+    return ring.owner(token) == worker_name(WORKER_INDEX)
+
+
+def run_worker(index):
+    """Точка входа процесса-воркера в режиме WORKERS > 1."""
+    global WORKER_INDEX
+    WORKER_INDEX = index
+    main()
+
+
+def supervise():
+    """Режим супервизора: запускает WORKERS процессов-воркеров."""
+    if STATE_DB == ':memory:':
+        logger.warning(
+            'STATE_DB не задан: воркеры не разделяют состояние '
+            'и не сохранят его при перезапуске'
+        )
+    logger.info(f'Запускаем воркеры: {WORKERS}')
+    shutdown = GracefulShutdown()
+    shutdown.install()
+    try:
+        Supervisor(WORKERS, run_worker).run(
+            running=lambda: not shutdown.requested
+        )
+    finally:
+        shutdown.restore()
+
+
+def make_lease():
+    """
+    Аренда шарда этого процесса или None, если LEASE_DB не задан.
+    Имя учитывает число воркеров: экземпляры с одинаковым WORKERS
+    делят одни и те же наборы подписчиков. Экземпляры с другим WORKERS
+    не начнут опрос, пока действует раскладка текущих.
+    """
+    if not LEASE_DB:
+        return None
+    return Lease(
+        LEASE_DB, shard_name(), ttl=LEASE_TTL, layout=f'workers-{WORKERS}'
+    )
+
+
+def shard_name():
+    """Имя шарда этого процесса для аренды и сохранённой очереди."""
+    return f'shard-{WORKER_INDEX or 0}-of-{WORKERS}'
+
+
+def lead(lease, poller):
+    """
+    Проверяет, что этот экземпляр должен опрашивать свой шард.
+    Без аренды экземпляр ведущий всегда. При захвате шарда Poller
+    забирает его сохранённую очередь, при потере - отдаёт свою,
+    см. Poller.take_over и Poller.step_down.
+    """
+    if lease is not None and not lease.acquire():
+        if poller.leading:
+            poller.step_down()
+        return False
+    if not poller.leading:
+        poller.take_over()
+    return True
+
+
+def homework_key(homework):
+    """Ключ домашки для дедупликации: id, а при его отсутствии - имя."""
+    return str(homework.get('id', homework.get('homework_name')))
+
+
+def notification_key(token, homework):
+    """Ключ уведомления о статусе домашки в индексе дедупликации."""
+    return dedup_key(
+        token,
+        homework_key(homework),
+        homework.get('status'),
+        homework.get('date_updated'),
+    )
+
+
+def parse_statuses(homeworks, statuses):
+    """
+    Разбирает все домашки ответа за один проход.
+    Пропускает повторы пары (домашка, статус) и уже отправленные статусы.
+    Возвращает список StatusUpdate и ошибки разбора отдельных домашек.
+    """
+    messages = []
+    errors = []
+    for homework in reversed(homeworks):
+        key = homework_key(homework)
+        status = homework.get('status')
+        if key in statuses and statuses[key] == status:
+            continue
+        try:
+            messages.append(StatusUpdate(homework, parse_status(homework)))
+        except (ex.HaveNotHomeworkName, ex.UnknownStatusException) as error:
+            errors.append(error)
+            continue
+        statuses[key] = status
+    return messages, errors
+
+
+def process_response(subscription, state, response):
+    """Разбирает ответ API и возвращает уведомления для подписчика."""
+    homeworks = check_response(response)
+    timestamp = cursors.advance(state.timestamp, response.get('current_date'))
+    messages, errors = parse_statuses(homeworks, state.statuses)
+    notifications = [
+        Notification(
+            subscription.chat_id,
+            update.message,
+            notification_key(subscription.token, update.homework),
+        )
+        for update in messages
+    ]
+    if messages:
+        state.last_message = messages[-1].message
+    if errors:
+        notifications += process_error(subscription, state, errors[0])
+    state.timestamp = timestamp
+    return notifications
+
+
+def process_error(subscription, state, error):
+    """Логирует ошибку опроса и решает, нужно ли сообщить о ней."""
+    if isinstance(error, (ex.ApiRequestFailed, ex.WrongAnswerStatus)):
+        message = renderer.error('api_error', error)
+    elif isinstance(error, ex.UnknownStatusException):
+        message = renderer.error('response_error', error)
+    else:
+        message = renderer.error('error', error)
+    logger.error(message)
+    if state.last_message == message:
+        return []
+    state.last_message = message
+    return [Notification(subscription.chat_id, message)]
+
+
+class Poller:
+    """Опрос API и отправка уведомлений для всех подписчиков."""
+
+    def __init__(self, bot, registry, scheduler, breaker, pipeline, store,
+                 outbox, dedup=None, freshness=0, shard='', lease=None):
+        """
+        Связывает бота, реестр, планировщик, конвейер и хранилища.
+        dedup - индекс отправленных уведомлений, None - без индекса.
+        freshness - сколько секунд ответ API отдаётся повторным
+        запросам того же токена из памяти.
+        shard - имя шарда, под которым сохраняется неотправленная очередь.
+        lease - аренда шарда: она продлевается во время долгих опросов
+        и отправок, а с истёкшей арендой сообщения не отправляются.
+        """
+        self.bot = bot
+        self.registry = registry
+        self.scheduler = scheduler
+        self.breaker = breaker
+        self.pipeline = pipeline
+        self.outbox = outbox
+        self.store = store
+        self.dedup = dedup
+        self.flights = SingleFlight(freshness)
+        self.shard = shard
+        self.lease = lease
+        self.leading = False
+        self.states = {}
+
+    def known_state(self, token):
+        """
+        Последнее известное состояние подписчика без создания нового.
+        Подписчики других воркеров читаются из общего хранилища.
+        """
+        state = self.states.get(token)
+        if state is None:
+            state = self.store.load(token)
+        return state
+
+    def refresh(self, token):
+        """
+        Свежий ответ API для команды /refresh, состояние не меняется.
+        Запрос объединяется с плановым опросом того же токена. Если
+        изменение увидел только этот запрос, запись кеша ответов
+        сбрасывается, чтобы плановый опрос тоже счёл ответ новым.
+        """
+        state = self.known_state(token)
+        timestamp = (
+            state.timestamp if state is not None
+            else cursors.initial()
+        )
+        answer, changed = self.flights.do(
+            (token, timestamp), fetch_statuses, token, timestamp
+        )
+        if changed:
+            response_cache.forget(token)
+        return check_response(answer)
+
+    def state(self, token):
+        """
+        Состояние подписчика из памяти или из хранилища.
+        Новый подписчик получает запрос за последние три месяца.
+        """
+        state = self.states.get(token)
+        if state is None:
+            state = self.store.load(token)
+            if state is None:
+                state = SubscriberState(cursors.initial())
+            state.timestamp = cursors.restore(state.timestamp)
+            self.states[token] = state
+        return state
+
+    async def poll(self, subscription, state):
+        """Один цикл опроса API и отправки уведомлений для подписчика."""
+        active = False
+        failed = False
+        try:
+            response, changed = await get_api_answer_async(
+                self.pipeline, subscription.token, state.timestamp,
+                self.flights,
+            )
+            notifications = []
+            if changed:
+                statuses = dict(state.statuses)
+                notifications = process_response(
+                    subscription, state, response
+                )
+                active = statuses != state.statuses
+        except ex.CircuitOpenException as error:
+            logger.warning(f'Опрос отложен: {error}')
+            self.scheduler.postpone(
+                subscription.token, self.breaker.retry_in()
+            )
+            return
+        except Exception as error:
+            failed = True
+            notifications = process_error(subscription, state, error)
+        self.scheduler.observe(
+            subscription.token,
+            active,
+            'reviewing' in state.statuses.values(),
+            failed,
+        )
+        for notification in notifications:
+            if self.dedup is not None and notification.key in self.dedup:
+                logger.debug(
+                    f'Повтор уведомления для чата {notification.chat_id}'
+                )
+                continue
+            self.outbox.put(notification)
+
+    async def poll_batch(self, tokens):
+        """
+        Опрашивает подписчиков конкурентно и сохраняет их состояние.
+        Возвращает токены отписавшихся, чтобы снять их с расписания.
+        """
+        polls = []
+        polled = []
+        dropped = []
+        for token in tokens:
+            subscription = self.registry.get(token)
+            if subscription is None:
+                self.states.pop(token, None)
+                self.store.delete(token)
+                dropped.append(token)
+                continue
+            state = self.state(token)
+            polled.append((token, state))
+            polls.append(self.poll(subscription, state))
+        await self.leased(asyncio.gather(*polls))
+        self.store.save_many(polled)
+        return dropped
+
+    def poll_many(self, tokens):
+        """Синхронная обёртка над poll_batch для планировщика."""
+        return self.pipeline.run(self.poll_batch(tokens))
+
+    async def keep_lease(self):
+        """Продлевает аренду каждые renew_interval секунд."""
+        while True:
+            await asyncio.sleep(self.lease.renew_interval)
+            if not self.lease.acquire():
+                logger.warning(
+                    f'Аренда {self.lease.name} потеряна во время цикла'
+                )
+                return
+
+    async def leased(self, awaitable):
+        """
+        Ждёт awaitable, продлевая аренду.
+        Иначе опрос или отправка дольше ttl отдали бы шард резервному
+        экземпляру, пока этот ещё работает, и уведомления ушли бы дважды.
+        """
+        if self.lease is None:
+            return await awaitable
+        keeper = asyncio.ensure_future(self.keep_lease())
+        try:
+            return await awaitable
+        finally:
+            keeper.cancel()
+
+    def may_send(self):
+        """Можно ли отправлять: аренды нет или она ещё действует."""
+        return self.lease is None or self.lease.valid()
+
+    async def drain(self):
+        """Отправляет сообщения, которые лимиты Telegram разрешают сейчас."""
+        if not self.may_send():
+            logger.warning('Аренда истекла, отправка остановлена')
+            return
+        batch = self.outbox.ready()
+        results = await self.leased(asyncio.gather(
+            *(
+                send_message_async(
+                    self.pipeline, self.bot, envelope.notification()
+                )
+                for envelope in batch
+            ),
+            return_exceptions=True,
+        ))
+        now = time.monotonic()
+        for envelope, result in zip(batch, results):
+            if isinstance(result, telegram.error.RetryAfter):
+                self.outbox.done(envelope, result, result.retry_after)
+            elif isinstance(result, Exception):
+                self.outbox.done(envelope, result)
+            elif result is False:
+                self.outbox.done(envelope, 'сообщение не отправлено')
+            else:
+                self.outbox.done(envelope)
+                if self.dedup is not None:
+                    self.dedup.add_many(envelope.keys)
+                metrics.SEND_LATENCY.observe(now - envelope.enqueued)
+
+    def flush(self):
+        """
+        Синхронная обёртка над drain.
+        Возвращает паузу до следующей отправки или None, если очередь пуста.
+        """
+        self.pipeline.run(self.drain())
+        return self.outbox.next_delay()
+
+    async def drain_until(self, deadline):
+        """
+        Отправляет очередь, пока она не опустеет или не придёт deadline.
+        Без действующей аренды отправлять нельзя, и ждать нечего.
+        """
+        while self.may_send():
+            await self.drain()
+            delay = self.outbox.next_delay()
+            if delay is None or time.monotonic() + delay > deadline:
+                return
+            await asyncio.sleep(delay)
+
+    def take_over(self):
+        """
+        Начало опроса шарда: при запуске или после захвата аренды.
+        Фильтр индекса дедупликации перестраивается по общей базе,
+        очередь, сохранённая прежним держателем, возвращается в отправку.
+        """
+        self.leading = True
+        if self.dedup is not None:
+            self.dedup.prune()
+        self.restore_pending()
+
+    def step_down(self):
+        """
+        Конец опроса шарда после потери аренды.
+        Состояние в памяти сбрасывается, чтобы при новом захвате оно
+        загрузилось из общего хранилища; неотправленная очередь
+        сохраняется для нового держателя, чтобы не отправлять её вдвоём.
+        """
+        self.leading = False
+        self.states.clear()
+        pending = self.outbox.pending()
+        if pending:
+            logger.warning(
+                f'Аренда потеряна, сообщений передано новому держателю: '
+                f'{len(pending)}'
+            )
+            self.store.save_pending(pending, self.shard)
+
+    def restore_pending(self):
+        """
+        Возвращает в очередь сообщения, сохранённые для этого шарда.
+        Вызывается в каждом цикле: прежний держатель мог сохранить очередь
+        уже после захвата аренды. Сообщения, все уведомления которых уже
+        отправлены, пропускаются.
+        """
+        pending = self.store.take_pending(self.shard)
+        for chat_id, text, keys in pending:
+            if (keys and self.dedup is not None
+                    and all(key in self.dedup for key in keys)):
+                continue
+            self.outbox.restore(chat_id, text, keys)
+        if pending:
+            logger.info(
+                f'Восстановлено неотправленных сообщений: {len(pending)}'
+            )
+
+    def close(self, timeout):
+        """
+        Завершение работы.
+        Досылает очередь не дольше timeout секунд, сохраняет состояние
+        подписчиков и неотправленные сообщения, закрывает конвейер и базы.
+        """
+        self.pipeline.run(self.drain_until(time.monotonic() + timeout))
+        self.store.save_many(self.states.items())
+        pending = self.outbox.pending()
+        if pending:
+            logger.warning(
+                f'Не успели отправить сообщений: {len(pending)}, '
+                f'их отправит следующий держатель шарда'
+            )
+            self.store.save_pending(pending, self.shard)
+        self.pipeline.close()
+        if self.dedup is not None:
+            self.dedup.close()
+        self.store.close()
+
+
+def start_commands(poller):
+    """
+    Запускает приём команд в фоновом потоке, если он включён.
+    getUpdates допускает одного получателя на бота, поэтому в режиме
+    воркеров команды принимает только первый из них, с полным реестром.
+    С файлом подписок у обработчика свой реестр: файл пишет только он,
+    а реестр опроса обновляется из файла в основном потоке.
+    Возвращает запущенный UpdateListener или None.
+    """
+    if not TELEGRAM_COMMANDS or WORKER_INDEX:
+        return None
+    registry = poller.registry
+    if SUBSCRIPTIONS_FILE:
+        registry = load_subscriptions()
+    handler = CommandHandler(
+        registry, poller.known_state, poller.refresh, renderer.escape
+    )
+    if TELEGRAM_API_URL:
+        bot = telegram.Bot(token=TELEGRAM_TOKEN, base_url=TELEGRAM_API_URL)
+    else:
+        bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    listener = UpdateListener(
+        bot, handler, timeout=UPDATES_TIMEOUT, parse_mode=MESSAGE_PARSE_MODE
+    )
+    listener.start()
+    logger.info('Принимаем команды пользователей')
+    return listener
+
+
+def accept_subscriptions(commands, poller, scheduler):
+    """
+    Ставит в расписание подписки, оформленные командой /subscribe.
+    Подписки других воркеров те получают из файла подписок,
+    см. sync_subscriptions.
+    """
+    if commands is None:
+        return
+    for token in commands.handler.drain_new():
+        subscription = commands.handler.registry.get(token)
+        if subscription is None or not owns(token):
+            continue
+        poller.registry.add(*subscription)
+        scheduler.add(token)
+
+
+def make_watcher():
+    """Наблюдатель за файлом подписок или None без SUBSCRIPTIONS_FILE."""
+    if not SUBSCRIPTIONS_FILE:
+        return None
+    return RegistryWatcher(SUBSCRIPTIONS_FILE)
+
+
+def sync_subscriptions(watcher, poller):
+    """
+    Применяет изменения файла подписок.
+    Так воркер узнаёт о подписках и отписках, принятых командами в другом
+    процессе. Новые токены своего шарда ставятся в расписание, снятые
+    исчезают из реестра и снимаются с расписания при ближайшем опросе.
+    """
+    if watcher is None:
+        return
+    registry = watcher.changed()
+    if registry is None:
+        return
+    if WORKER_INDEX is not None:
+        registry = shard_subscriptions(registry, WORKER_INDEX, WORKERS)
+    added = [
+        subscription.token for subscription in registry
+        if subscription.token not in poller.registry
+    ]
+    poller.registry.replace(registry)
+    for token in added:
+        poller.scheduler.add(token)
+    logger.info(
+        f'Файл подписок перечитан: подписчиков {len(registry)}, '
+        f'новых {len(added)}'
+    )
+
+
+def configure_transport(breaker):
+    """
+    Настраивает пул соединений, ограничитель и предохранитель.
+    Для одного подписчика с паузой в 10 минут keep-alive соединение
+    всё равно закроется сервером, поэтому пул по умолчанию включается
+    только в режиме с файлом подписок.
+    """
+    pool_size = HTTP_POOL_SIZE
+    if not pool_size and SUBSCRIPTIONS_FILE:
+        pool_size = POLL_CONCURRENCY
+    limiter = HostRateLimiter(API_RATE_LIMIT, API_HOST_RATE_LIMITS)
+    return transport.configure(pool_size, API_TIMEOUT, limiter, breaker)
+
+
+def run_cycle(poller, lease, commands, watcher=None):
+    """
+    Один цикл опроса и отправки, возвращает паузу до следующего.
+    С файлом подписок пауза не длиннее SUBSCRIPTIONS_SYNC секунд,
+    чтобы новые подписки опрашивались без ожидания полного периода.
+    """
+    accept_subscriptions(commands, poller, poller.scheduler)
+    sync_subscriptions(watcher, poller)
+    if not lead(lease, poller):
+        logger.info(f'Шард {lease.name} опрашивает {lease.holder()}')
+        return lease.renew_interval
+    poller.restore_pending()
+    logger.info(f'Запускаем опрос подписчиков: {len(poller.registry)}')
+    delay = poller.scheduler.run_pending(poller.poll_many)
+    if lease is not None:
+        delay = min(delay, lease.renew_interval)
+    send_delay = poller.flush()
+    if send_delay is not None:
+        delay = min(delay, send_delay)
+    if watcher is not None:
+        delay = min(delay, SUBSCRIPTIONS_SYNC)
+    logger.info(f'Следующий запрос к серверу через {delay} с.')
+    return delay
+
+
+def stop(shutdown, poller, lease, commands):
+    """
+    Завершение работы после сигнала или ошибки.
+    Новые опросы уже не запускаются; очередь досылается не дольше
+    SHUTDOWN_TIMEOUT секунд, состояние сохраняется, аренда освобождается,
+    чтобы резервный экземпляр подхватил шард сразу.
+    """
+    if shutdown.requested:
+        logger.info(f'Получен {shutdown.signal_name}, завершаем работу')
+    if commands is not None:
+        commands.stop(timeout=1)
+    poller.close(SHUTDOWN_TIMEOUT)
+    if lease is not None:
+        lease.release()
+        lease.close()
+    transport.close()
+    logger.info('Работа завершена')
+
+
+def register_metrics(scheduler, breaker, poller):
+    """
+    Регистрирует показатели подписчиков и очереди.
+    А также пула, кешей, индекса дедупликации и предохранителя.
+    """
+    outbox = poller.outbox
+    dedup = poller.dedup
+    metrics.REGISTRY.register(metrics.Gauge(
+        'homework_bot_subscribers',
+        'Подписчики в расписании опросов.',
+        lambda: len(scheduler),
+    ))
+    metrics.REGISTRY.register(metrics.Gauge(
+        'homework_bot_outbox_queued',
+        'Сообщения в очереди отправки.',
+        lambda: len(outbox),
+    ))
+    metrics.REGISTRY.register(metrics.CallbackCounter(
+        'homework_bot_messages_total',
+        'Результаты отправки сообщений.',
+        lambda: {
+            result: outbox.stats()[result]
+            for result in ('sent', 'retried', 'dropped')
+        },
+        label='result',
+    ))
+    metrics.REGISTRY.register(metrics.Gauge(
+        'homework_bot_breaker_state',
+        'Состояние предохранителя запросов к API.',
+        lambda: {
+            state: int(breaker.state == state)
+            for state in ('closed', 'open', 'half_open')
+        },
+        label='state',
+    ))
+    metrics.REGISTRY.register(metrics.CallbackCounter(
+        'homework_bot_http_pool_requests_total',
+        'Запросы по открытым (hits) и новым (misses) соединениям.',
+        lambda: {
+            result: transport.stats()[result] for result in ('hits', 'misses')
+        },
+        label='result',
+    ))
+    metrics.REGISTRY.register(metrics.CallbackCounter(
+        'homework_bot_response_cache_total',
+        'Неизменившиеся (hits) и новые (misses) ответы API.',
+        lambda: {
+            'hits': response_cache.hits, 'misses': response_cache.misses
+        },
+        label='result',
+    ))
+    metrics.REGISTRY.register(metrics.CallbackCounter(
+        'homework_bot_render_cache_total',
+        'Сообщения из кеша отрисовки (hits) и отрисованные заново (misses).',
+        lambda: {
+            'hits': renderer.cache_info().hits,
+            'misses': renderer.cache_info().misses,
+        },
+        label='result',
+    ))
+    metrics.REGISTRY.register(metrics.CallbackCounter(
+        'homework_bot_api_requests_coalesced_total',
+        'Запросы к API: выполненные, объединённые и отданные из памяти.',
+        poller.flights.stats,
+        label='result',
+    ))
+    metrics.REGISTRY.register(metrics.CallbackCounter(
+        'homework_bot_dedup_total',
+        'Повторные (hits) и новые (misses) уведомления в индексе.',
+        lambda: {'hits': dedup.hits, 'misses': dedup.misses},
+        label='result',
+    ))
 
 
 def main():
     """
     Невероятно, но факт.
     Это основная функция, запускающая все остальные
-    с периодичностью в 10 минут.
+    с периодичностью в 10 минут для каждого подписчика.
     Первый запрос делается за последние три месяца.
     """
     if check_tokens() is False:
         logger.critical('Отсутствуют переменные окружения!')
         sys.exit()
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    timestamp = (int(time.time()) - THREE_MONTHS)
-    message = ''
-    old_message = ''
-
-    def logging_errors(message):
-        logger.error(message)
-        if old_message != message:
-            send_message(bot, message)
-
-    while True:
-        logger.info('Запускаем главную функцию')
-        try:
-            response = get_api_answer(timestamp)
-            homework = check_response(response)
-            if len(homework) > 0:
-                message = parse_status(homework[0])
-                send_message(bot, message)
-            timestamp = response.get('current_date')
-        except requests.RequestException as error:
-            message = f'Проблема в работе API: {error}.'
-            logging_errors(message)
-        except ex.UnknownStatusException as error:
-            message = f'Ошибка в обработке ответа: {error}.'
-            logging_errors(message)
-        except Exception as error:
-            message = f'Что-то пошло не так: {error}'
-            logging_errors(message)
-        finally:
-            old_message = message
-            logger.info('Следующий запрос к серверу через 10 минут.')
-            time.sleep(RETRY_PERIOD)
+    if WORKERS > 1 and WORKER_INDEX is None:
+        return supervise()
+    if TELEGRAM_API_URL:
+        bot = telegram.Bot(token=TELEGRAM_TOKEN, base_url=TELEGRAM_API_URL)
+    else:
+        bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    watcher = make_watcher()
+    registry = load_subscriptions()
+    if WORKER_INDEX is not None:
+        registry = shard_subscriptions(registry, WORKER_INDEX, WORKERS)
+    breaker = CircuitBreaker(
+        failure_threshold=BREAKER_THRESHOLD,
+        base_delay=BREAKER_BASE_DELAY,
+        max_delay=RETRY_PERIOD,
+    )
+    configure_transport(breaker)
+    scheduler = PollScheduler(
+        RETRY_PERIOD,
+        min_period=MIN_POLL_PERIOD,
+        max_period=MAX_POLL_PERIOD,
+        idle_polls=IDLE_POLLS_BEFORE_BACKOFF,
+    )
+    poller = Poller(
+        bot,
+        registry,
+        scheduler,
+        breaker,
+        AsyncPipeline(POLL_CONCURRENCY),
+        StateStore(STATE_DB),
+        Outbox(
+            global_rate=TELEGRAM_RATE_LIMIT,
+            chat_interval=TELEGRAM_CHAT_INTERVAL,
+            max_attempts=SEND_MAX_ATTEMPTS,
+            max_length=TELEGRAM_MESSAGE_LIMIT,
+        ),
+        DedupIndex(STATE_DB, ttl=THREE_MONTHS, capacity=DEDUP_CAPACITY),
+        freshness=REFRESH_FRESHNESS,
+        shard=shard_name(),
+        lease=make_lease(),
+    )
+    scheduler.add_spread(subscription.token for subscription in registry)
+    register_metrics(scheduler, breaker, poller)
+    if METRICS_PORT:
+        metrics.start_server(
+            METRICS_PORT + (WORKER_INDEX or 0), METRICS_HOST
+        )
+    lease = poller.lease
+    commands = start_commands(poller)
+
+    shutdown = GracefulShutdown()
+    shutdown.install()
+
+    try:
+        while not shutdown.requested:
+            delay = run_cycle(poller, lease, commands, watcher)
+            with shutdown.sleeping():
+                if not shutdown.requested:
+                    time.sleep(delay)
+    finally:
+        shutdown.restore()
+        stop(shutdown, poller, lease, commands)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,145 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+)
+'''
+
+# Запись о раскладке шардов, которой принадлежат все аренды шардов.
+LAYOUT = 'layout'
+
+
+def default_owner():
+    """Уникальное имя экземпляра: хост, pid и случайный суффикс."""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class Lease:
+    """
+    Аренда шарда подписчиков в общей базе SQLite.
+    Опрашивает только держатель аренды. Держатель продлевает её каждые
+    ttl / 3 секунд; если он пропал, аренда истекает через ttl, и резервный
+    экземпляр забирает её не позже чем через ttl + ttl / 3.
+    Время - wall clock, чтобы его можно было сравнивать между процессами.
+
+    layout - раскладка шардов, например число воркеров. Имя шарда зависит
+    от раскладки, поэтому экземпляры с разной раскладкой не делят аренды
+    шардов. Чтобы они не опрашивали одних подписчиков одновременно,
+    держатель шарда в той же транзакции продлевает общую запись раскладки.
+    Экземпляры другой раскладки ждут, пока она истечёт: при выкладке
+    с новым числом воркеров это не позже ttl после остановки старых.
+    """
+
+    def __init__(self, path, name, owner=None, ttl=60, clock=time.time,
+                 layout=None):
+        self.path = path
+        self.name = name
+        self.layout = layout
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+        self.clock = clock
+        self.held = False
+        self.expires = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(SCHEMA)
+
+    @property
+    def renew_interval(self):
+        """Как часто продлевать аренду и пытаться её захватить."""
+        return max(1, int(self.ttl / 3))
+
+    def acquire(self):
+        """
+        Захватывает свободную или истёкшую аренду либо продлевает свою.
+        Возвращает True, если экземпляр держит аренду.
+        """
+        now = self.clock()
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                held = self._free(self.name, self.owner, now)
+                if self.layout is not None:
+                    held = held and self._free(LAYOUT, self.layout, now)
+                if held:
+                    self._claim(self.name, self.owner, now + self.ttl)
+                    if self.layout is not None:
+                        self._claim(LAYOUT, self.layout, now + self.ttl)
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+        self.held = held
+        self.expires = now + self.ttl if held else 0
+        return held
+
+    def _row(self, name):
+        return self._connection.execute(
+            'SELECT owner, expires FROM leases WHERE name = ?', (name,)
+        ).fetchone()
+
+    def _free(self, name, owner, now):
+        row = self._row(name)
+        return row is None or row[0] == owner or row[1] <= now
+
+    def _claim(self, name, owner, expires):
+        self._connection.execute(
+            'INSERT INTO leases (name, owner, expires) '
+            'VALUES (?, ?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET '
+            'owner = excluded.owner, expires = excluded.expires',
+            (name, owner, expires),
+        )
+
+    def valid(self):
+        """
+        Держит ли экземпляр аренду прямо сейчас, без обращения к базе.
+        Аренда, не продлённая за ttl, считается потерянной, даже если
+        резервный экземпляр её ещё не забрал.
+        """
+        return self.held and self.clock() < self.expires
+
+    def holder(self):
+        """
+        Текущий держатель аренды или None, если она свободна.
+        Пока действует чужая раскладка, возвращается она.
+        """
+        now = self.clock()
+        with self._lock:
+            layout = self._row(LAYOUT) if self.layout is not None else None
+            row = self._row(self.name)
+        if (layout is not None and layout[0] != self.layout
+                and layout[1] > now):
+            return f'{LAYOUT} {layout[0]}'
+        if row is None or row[1] <= now:
+            return None
+        return row[0]
+
+    def release(self):
+        """
+        Отдаёт аренду, чтобы резервный экземпляр забрал её сразу.
+        Запись раскладки общая для всех шардов и истекает сама.
+        """
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM leases WHERE name = ? AND owner = ?',
+                (self.name, self.owner),
+            )
+        self.held = False
+        self.expires = 0
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,73 @@
+import contextlib
+import signal
+import threading
+
+
+class Interrupted(Exception):
+    """Пауза прервана сигналом остановки."""
+
+    pass
+
+
+class GracefulShutdown:
+    """
+    Остановка по SIGTERM и SIGINT без потери данных.
+    Обработчик сигнала только ставит флаг requested: опрос и отправка,
+    которые уже идут, доводятся до конца. Сразу прерывается лишь пауза
+    между циклами внутри sleeping(), чтобы не ждать её до SIGKILL.
+    """
+
+    SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+    def __init__(self, signals=SIGNALS):
+        self.signals = signals
+        self.requested = False
+        self.signum = None
+        self._sleeping = False
+        self._previous = {}
+
+    @property
+    def signal_name(self):
+        """Имя полученного сигнала или None."""
+        if self.signum is None:
+            return None
+        return signal.Signals(self.signum).name
+
+    def install(self):
+        """
+        Ставит обработчики сигналов.
+        Это возможно только в главном потоке, в остальных возвращает False.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        for signum in self.signals:
+            self._previous[signum] = signal.signal(signum, self.handle)
+        return True
+
+    def restore(self):
+        """Возвращает обработчики, которые стояли до install()."""
+        while self._previous:
+            signum, handler = self._previous.popitem()
+            signal.signal(signum, handler)
+
+    def handle(self, signum, frame):
+        """Обработчик сигнала: запоминает запрос остановки."""
+        self.requested = True
+        self.signum = signum
+        if self._sleeping:
+            raise Interrupted(signum)
+
+    @contextlib.contextmanager
+    def sleeping(self):
+        """
+        Участок, который сигнал остановки прерывает сразу.
+        Внутри стоит снова проверить requested: сигнал мог прийти
+        перед входом.
+        """
+        self._sleeping = True
+        try:
+            yield
+        except Interrupted:
+            pass
+        finally:
+            self._sleeping = False
@@ -1,27 +1,150 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_CALLER = os.getenv('LOG_CALLER', '1') != '0'
+# homework.py берёт логгер по имени 'homework', а не __name__: при запуске
+# скриптом это '__main__', а в воркерах, запущенных через spawn, '__mp_main__'.
+DEFAULT_LEVELS = {
+    'homework': 'DEBUG',
+    'commands': 'INFO',
+    'cursor': 'INFO',
+    'outbox': 'INFO',
+    'sharding': 'INFO',
+}
+
+TEXT_FORMAT = '[%(levelname)s: %(asctime)s] %(message)s'
+CALLER_FORMAT = ' | func: %(funcName)s, line: %(lineno)d |'
+
+_listeners = []
+
+
+class CallerlessLogger(logging.Logger):
+    """
+    Логгер, который не ищет вызывающую функцию через стек.
+    При LOG_CALLER=0 им становятся все логгеры, см. use_callerless_loggers.
+    """
+
+    def findCaller(self, stack_info=False, stacklevel=1):
+        """Место вызова не определяется."""
+        return '(unknown file)', 0, '(unknown function)', None
+
+
+class JsonFormatter(logging.Formatter):
+    """Компактная запись лога в одну строку JSON."""
+
+    def __init__(self, caller=True):
+        super().__init__()
+        self.caller = caller
+
+    def format(self, record):
+        """Сериализует запись лога в JSON."""
+        data = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if self.caller:
+            data['func'] = record.funcName
+            data['line'] = record.lineno
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def parse_levels(value):
+    """Разбирает строку вида 'module=LEVEL,module2=LEVEL2'."""
+    levels = {}
+    for item in filter(None, (value or '').split(',')):
+        name, level = item.split('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def queue_handler(json_output=False, caller=True, stream=None):
+    """
+    Обработчик, который только кладёт запись в очередь.
+    Форматирование и запись в stream (по умолчанию stdout) выполняет
+    фоновый QueueListener, поэтому вывод логов не задерживает опрос
+    и отправку. Слушатель доступен как атрибут listener обработчика.
+    """
+    target = logging.StreamHandler(stream or sys.stdout)
+    if json_output:
+        target.setFormatter(JsonFormatter(caller))
+    else:
+        target.setFormatter(logging.Formatter(
+            TEXT_FORMAT + (CALLER_FORMAT if caller else '')
+        ))
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, target, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    handler = QueueHandler(records)
+    handler.listener = listener
+    return handler
+
+
+def use_callerless_loggers():
+    """
+    Отключает поиск места вызова во всех логгерах.
+    Новые логгеры создаются классом CallerlessLogger, а уже созданные
+    (модули, импортированные раньше этого) получают его на месте:
+    своих полей у класса нет.
+    """
+    logging.setLoggerClass(CallerlessLogger)
+    for logger in list(logging.Logger.manager.loggerDict.values()):
+        if type(logger) is logging.Logger:
+            logger.__class__ = CallerlessLogger
+
+
+def stop_listeners():
+    """Дописывает накопленные записи и останавливает фоновые потоки."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+atexit.register(stop_listeners)
+
+# Форматы не выводят поток и процесс: записи не собирают эти сведения.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+if not LOG_CALLER:
+    use_callerless_loggers()
+
+LOG_LEVELS = {**DEFAULT_LEVELS, **parse_levels(os.getenv('LOG_LEVELS'))}
+
 LOGGING_CONFIG = {
     'version': 1,
     'disable_existing_loggers': False,
 
-    'formatters': {
-        'default_formatter': {
-            'format': ('[%(levelname)s: %(asctime)s] %(message)s '
-                       '| func: %(funcName)s, line: %(lineno)d |')
+    'handlers': {
+        'queue_handler': {
+            '()': queue_handler,
+            'json_output': LOG_FORMAT == 'json',
+            'caller': LOG_CALLER,
         },
     },
 
-    'handlers': {
-        'stream_handler': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'default_formatter',
-            'stream': 'ext://sys.stdout',
-        },
+    'root': {
+        'handlers': ['queue_handler'],
+        'level': os.getenv('LOG_ROOT_LEVEL', 'WARNING'),
     },
 
     'loggers': {
-        '__main__': {
-            'handlers': ['stream_handler'],
-            'level': 'DEBUG',
-            'propagate': True
-        }
-    }
+        name: {'level': level, 'propagate': True}
+        for name, level in LOG_LEVELS.items()
+    },
 }
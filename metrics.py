@@ -0,0 +1,230 @@
+import bisect
+import functools
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30
+)
+
+
+def format_labels(names, values):
+    """Метки в формате Prometheus: {name="value",...}."""
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{value}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    """Монотонный счётчик с необязательными метками."""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        """Увеличивает счётчик для набора меток."""
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount
+            )
+
+    def samples(self):
+        """Строки значений для экспозиции."""
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f'{self.name}{format_labels(self.labels, values)} {value}'
+            for values, value in items
+        ]
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и необязательными метками."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Учитывает одно измерение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0
+                ]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        """Строки корзин, суммы и количества для экспозиции."""
+        with self._lock:
+            items = [
+                (values, list(counts), total, count)
+                for values, (counts, total, count) in self._values.items()
+            ]
+        lines = []
+        names = self.labels + ('le',)
+        for values, counts, total, count in items:
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = format_labels(names, values + (bound,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labels, values)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Gauge:
+    """
+    Показатель, который вычисляется в момент снятия метрик.
+    Функция возвращает число или словарь {метка: значение} и вызывается
+    из потока HTTP-сервера, поэтому не должна обходить структуры, которые
+    в это время меняет основной цикл.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, function, label=None):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.label = label
+
+    def samples(self):
+        """Строки значений для экспозиции."""
+        value = self.function()
+        if self.label is None:
+            return [f'{self.name} {value}']
+        return [
+            f'{self.name}{format_labels((self.label,), (key,))} {item}'
+            for key, item in value.items()
+        ]
+
+
+class CallbackCounter(Gauge):
+    """
+    Счётчик, значения которого ведёт другой объект, например Outbox.sent.
+    Функция вызывается так же, как у Gauge, и должна возвращать
+    только неубывающие значения.
+    """
+
+    type = 'counter'
+
+
+class Registry:
+    """Набор метрик, отдаваемых в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику; метрика с тем же именем заменяется."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """Все метрики в текстовом формате экспозиции."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CALL_SECONDS = REGISTRY.register(Histogram(
+    'homework_bot_call_seconds',
+    'Время выполнения шагов опроса и отправки.',
+    ('function',),
+))
+CALL_ERRORS = REGISTRY.register(Counter(
+    'homework_bot_call_errors_total',
+    'Исключения в шагах опроса и отправки.',
+    ('function',),
+))
+SEND_LATENCY = REGISTRY.register(Histogram(
+    'homework_bot_send_latency_seconds',
+    'Время от постановки уведомления в очередь до доставки.',
+))
+
+
+def instrument(name):
+    """Декоратор: время выполнения и исключения функции в метриках."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                CALL_ERRORS.inc(1, name)
+                raise
+            finally:
+                CALL_SECONDS.observe(time.perf_counter() - started, name)
+        return wrapper
+    return decorator
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики по GET /metrics."""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        """Ответ на запрос метрик."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.registry.render().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Запросы метрик не логируются."""
+
+
+def start_server(port, host='127.0.0.1'):
+    """
+    Запускает HTTP-сервер метрик в фоновом потоке.
+    По умолчанию сервер слушает только локальный интерфейс.
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    )
+    thread.start()
+    return server
@@ -0,0 +1,110 @@
+import sys
+from collections import namedtuple
+
+
+class Subscription(namedtuple('Subscription', ('token', 'chat_id'))):
+    """Подписчик бота: токен Практикума и чат для уведомлений."""
+
+    __slots__ = ()
+
+
+class Notification(namedtuple(
+        'Notification', ('chat_id', 'text', 'key'), defaults=(None,))):
+    """
+    Сообщение, которое нужно отправить в конкретный чат.
+    key - ключ в индексе дедупликации, None для сообщений об ошибках.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.text
+
+
+class SubscriberState:
+    """Изменяемое состояние опроса одного подписчика."""
+
+    __slots__ = ('timestamp', 'last_message', 'statuses')
+
+    def __init__(self, timestamp, last_message='', statuses=None):
+        self.timestamp = timestamp
+        self.last_message = last_message
+        self.statuses = {} if statuses is None else statuses
+
+
+class Homework:
+    """
+    Домашка из ответа API: только поля, которые читает бот.
+    Поля, которых не было в ответе, не заполняются, поэтому get()
+    ведёт себя так же, как у словаря из ответа. Статусы интернируются:
+    у тысяч домашек одна и та же строка 'approved'.
+    """
+
+    FIELDS = ('id', 'homework_name', 'status', 'date_updated')
+
+    __slots__ = FIELDS
+
+    def __init__(self, **fields):
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    @classmethod
+    def from_api(cls, data):
+        """Запись из словаря ответа API; не словарь возвращается как есть."""
+        if not isinstance(data, dict):
+            return data
+        homework = cls()
+        for field in cls.FIELDS:
+            if field in data:
+                setattr(homework, field, data[field])
+        status = data.get('status')
+        if type(status) is str:
+            homework.status = sys.intern(status)
+        return homework
+
+    def get(self, field, default=None):
+        """Значение поля по имени из API, как dict.get."""
+        if field not in self.FIELDS:
+            return default
+        return getattr(self, field, default)
+
+    def fields(self):
+        """Значения всех полей по порядку FIELDS, None для отсутствующих."""
+        return tuple(self.get(field) for field in self.FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Homework):
+            return NotImplemented
+        return self.fields() == other.fields()
+
+    def __hash__(self):
+        return hash(self.fields())
+
+    def __repr__(self):
+        fields = ', '.join(
+            f'{field}={getattr(self, field)!r}'
+            for field in self.FIELDS if hasattr(self, field)
+        )
+        return f'Homework({fields})'
+
+
+def compact_answer(answer):
+    """
+    Ответ API, в котором домашки заменены записями Homework.
+    В таком виде ответ хранится в кеше ответов между опросами.
+    Ответ неожиданной формы возвращается как есть.
+    """
+    if not isinstance(answer, dict):
+        return answer
+    homeworks = answer.get('homeworks')
+    if not isinstance(homeworks, list):
+        return answer
+    compact = dict(answer)
+    compact['homeworks'] = [Homework.from_api(item) for item in homeworks]
+    return compact
+
+
+class StatusUpdate(namedtuple('StatusUpdate', ('homework', 'message'))):
+    """Новый статус домашки и текст уведомления о нём."""
+
+    __slots__ = ()
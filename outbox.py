@@ -0,0 +1,207 @@
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+
+from models import Notification
+from ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PRUNE_THRESHOLD = 1024
+
+
+def split_text(text, limit):
+    """
+    Делит текст на части не длиннее limit.
+    Режет по последнему переводу строки в пределах лимита,
+    а если его нет - ровно по лимиту.
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit + 1)
+        if cut <= 0:
+            chunks.append(text[:limit])
+            text = text[limit:]
+        else:
+            chunks.append(text[:cut])
+            text = text[cut:].lstrip('\n')
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+
+class Envelope:
+    """Сообщение в очереди: склеенные тексты для одного чата."""
+
+    __slots__ = ('chat_id', 'texts', 'keys', 'size', 'enqueued',
+                 'attempts', 'not_before')
+
+    def __init__(self, chat_id, enqueued):
+        self.chat_id = chat_id
+        self.texts = []
+        self.keys = []
+        self.size = 0
+        self.enqueued = enqueued
+        self.attempts = 0
+        self.not_before = enqueued
+
+    def notification(self):
+        """Одно сообщение Telegram из всех текстов конверта."""
+        return Notification(self.chat_id, '\n\n'.join(self.texts))
+
+
+class Outbox:
+    """
+    Очередь исходящих сообщений Telegram.
+    Соблюдает лимиты Telegram: не больше global_rate сообщений в секунду
+    на бота и одно сообщение в chat_interval секунд на чат.
+    Несколько обновлений для одного чата склеиваются в одно сообщение,
+    неотправленные повторяются с экспоненциальной паузой.
+    Размер очереди ведётся счётчиком: len() и stats() читают метрики
+    из другого потока и не должны обходить меняющиеся очереди чатов.
+    """
+
+    def __init__(self, global_rate=30, chat_interval=1, max_attempts=5,
+                 backoff=2, max_length=4096, clock=time.monotonic):
+        self.bucket = TokenBucket(global_rate, clock=clock)
+        self.chat_interval = chat_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_length = max_length
+        self.clock = clock
+        self._chats = OrderedDict()
+        self._next_allowed = {}
+        self._paused_until = 0
+        self._size = 0
+        self.sent = 0
+        self.retried = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def put(self, notification):
+        """
+        Ставит сообщение в очередь чата, склеивая с ожидающим.
+        Текст длиннее max_length делится на несколько сообщений,
+        ключ дедупликации достаётся последнему из них.
+        """
+        chunks = split_text(str(notification), self.max_length)
+        for chunk in chunks[:-1]:
+            self._append(notification.chat_id, chunk)
+        self._append(notification.chat_id, chunks[-1], notification.key)
+
+    def _append(self, chat_id, text, key=None):
+        queue = self._chats.get(chat_id)
+        if queue is None:
+            queue = self._chats[chat_id] = deque()
+        envelope = queue[-1] if queue else None
+        if (envelope is None or envelope.attempts
+                or envelope.size + len(text) + 2 > self.max_length):
+            envelope = Envelope(chat_id, self.clock())
+            queue.append(envelope)
+            self._size += 1
+        envelope.texts.append(text)
+        if key is not None:
+            envelope.keys.append(key)
+        envelope.size += len(text) + 2
+
+    def restore(self, chat_id, text, keys=()):
+        """Возвращает в очередь сообщение, сохранённое при остановке."""
+        self.put(Notification(chat_id, text))
+        self._chats[chat_id][-1].keys.extend(keys)
+
+    def pending(self):
+        """Забирает все неотправленные конверты, очередь пустеет."""
+        envelopes = [
+            envelope
+            for queue in self._chats.values() for envelope in queue
+        ]
+        self._chats.clear()
+        self._size = 0
+        return envelopes
+
+    def __len__(self):
+        return self._size
+
+    def ready(self):
+        """
+        Забирает конверты, которые можно отправить прямо сейчас,
+        по одному на чат и в пределах общего лимита.
+        """
+        now = self.clock()
+        if now < self._paused_until:
+            return []
+        if len(self._next_allowed) > PRUNE_THRESHOLD:
+            self._next_allowed = {
+                chat_id: allowed
+                for chat_id, allowed in self._next_allowed.items()
+                if allowed > now
+            }
+        batch = []
+        for chat_id, queue in list(self._chats.items()):
+            envelope = queue[0]
+            if (envelope.not_before > now
+                    or self._next_allowed.get(chat_id, 0) > now):
+                continue
+            if not self.bucket.try_acquire():
+                break
+            queue.popleft()
+            self._size -= 1
+            if not queue:
+                del self._chats[chat_id]
+            self._next_allowed[chat_id] = now + self.chat_interval
+            batch.append(envelope)
+        return batch
+
+    def done(self, envelope, error=None, retry_after=None):
+        """Учитывает результат отправки конверта."""
+        now = self.clock()
+        if error is None:
+            self.sent += 1
+            latency = now - envelope.enqueued
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            return
+        envelope.attempts += 1
+        if envelope.attempts >= self.max_attempts:
+            self.dropped += 1
+            logger.error(
+                f'Сообщение в чат {envelope.chat_id} отброшено после '
+                f'{envelope.attempts} попыток: {error}'
+            )
+            return
+        self.retried += 1
+        if retry_after is not None:
+            self._paused_until = max(self._paused_until, now + retry_after)
+            envelope.not_before = now + retry_after
+        else:
+            envelope.not_before = now + self.backoff ** envelope.attempts
+        queue = self._chats.get(envelope.chat_id)
+        if queue is None:
+            queue = self._chats[envelope.chat_id] = deque()
+        queue.appendleft(envelope)
+        self._size += 1
+
+    def next_delay(self):
+        """Целое число секунд до ближайшей возможной отправки или None."""
+        if not self._chats:
+            return None
+        now = self.clock()
+        due = min(
+            max(queue[0].not_before, self._next_allowed.get(chat_id, 0))
+            for chat_id, queue in self._chats.items()
+        )
+        due = max(due, self._paused_until)
+        return max(1, math.ceil(due - now))
+
+    def stats(self):
+        """Счётчики отправки для мониторинга."""
+        return {
+            'queued': len(self),
+            'sent': self.sent,
+            'retried': self.retried,
+            'dropped': self.dropped,
+            'latency_avg': self.latency_total / self.sent if self.sent else 0,
+            'latency_max': self.latency_max,
+        }
@@ -0,0 +1,38 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class AsyncPipeline:
+    """
+    Цикл событий с ограниченным числом одновременных операций.
+    Блокирующие вызовы (requests, python-telegram-bot) выполняются
+    в пуле потоков, поэтому сотни запросов и отправок идут внахлёст.
+    """
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='pipeline'
+        )
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        self._semaphore = None
+
+    async def call(self, func, *args, **kwargs):
+        """Выполняет блокирующую функцию, не занимая цикл событий."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await self._loop.run_in_executor(
+                self._executor, partial(func, *args, **kwargs)
+            )
+
+    def run(self, coroutine):
+        """Выполняет корутину в цикле событий конвейера."""
+        return self._loop.run_until_complete(coroutine)
+
+    def close(self):
+        """Останавливает цикл событий и пул потоков."""
+        self._executor.shutdown(wait=True)
+        self._loop.close()
@@ -0,0 +1,90 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Ведро токенов: не больше rate операций в секунду в среднем
+    и не больше capacity подряд. Ожидающие получают места по очереди.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def reserve(self, tokens=1):
+        """Занимает место и возвращает, сколько секунд нужно подождать."""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = 0
+            if self._tokens < 0:
+                wait = -self._tokens / self.rate
+            return max(wait, self._paused_until - now)
+
+    def try_acquire(self, tokens=1):
+        """Берёт токен без ожидания; False, если ведро пустое."""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if now < self._paused_until or self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def pause(self, seconds):
+        """Запрещает операции на seconds секунд (например, после 429)."""
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until, self.clock() + seconds
+            )
+
+
+class HostRateLimiter:
+    """
+    Общий лимит запросов в секунду и отдельные лимиты для хостов.
+    acquire блокирует вызывающий поток до разрешения запроса.
+    """
+
+    def __init__(self, rate, host_rates=None, sleep=time.sleep):
+        self.bucket = TokenBucket(rate)
+        self.host_buckets = {
+            host: TokenBucket(host_rate)
+            for host, host_rate in (host_rates or {}).items()
+        }
+        self.sleep = sleep
+
+    def acquire(self, url):
+        """Ждёт свободного места в общем лимите и в лимите хоста."""
+        wait = self.bucket.reserve()
+        host_bucket = self.host_buckets.get(urlsplit(url).hostname)
+        if host_bucket is not None:
+            wait = max(wait, host_bucket.reserve())
+        if wait > 0:
+            self.sleep(wait)
+
+    def pause(self, url, seconds):
+        """Приостанавливает запросы к хосту url."""
+        host_bucket = self.host_buckets.get(urlsplit(url).hostname)
+        (host_bucket or self.bucket).pause(seconds)
+
+
+def parse_host_rates(value):
+    """Разбирает строку вида 'host=rate,host2=rate2' в словарь."""
+    rates = {}
+    for item in filter(None, (value or '').split(',')):
+        host, rate = item.split('=')
+        rates[host.strip()] = float(rate)
+    return rates
@@ -0,0 +1,177 @@
+import hashlib
+import heapq
+import itertools
+import math
+import time
+
+
+def stable_fraction(token):
+    """Детерминированное псевдослучайное число из [0, 1) для токена."""
+    digest = hashlib.blake2b(str(token).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+class Pace:
+    """
+    Темп опроса подписчика.
+    Текущий интервал, число холостых опросов и ошибок подряд,
+    разовая отсрочка следующего опроса.
+    """
+
+    __slots__ = ('interval', 'idle', 'failures', 'postponed')
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.idle = 0
+        self.failures = 0
+        self.postponed = None
+
+
+class PollScheduler:
+    """
+    Планировщик опросов API для множества подписчиков.
+    Хранит кучу (время запуска, порядковый номер, токен), поэтому
+    выборка ближайших задач не зависит от общего числа подписчиков.
+
+    Интервал каждого подписчика подстраивается под активность:
+    работа на ревью - опрос раз в min_period, после idle_polls
+    опросов без изменений интервал растёт в factor раз до max_period.
+    Ошибки опроса подряд удваивают интервал, тоже до max_period.
+    """
+
+    def __init__(self, period, min_period=None, max_period=None,
+                 factor=2, idle_polls=3, clock=time.monotonic):
+        self.period = period
+        self.min_period = min_period or period
+        self.max_period = max_period or period
+        self.factor = factor
+        self.idle_polls = idle_polls
+        self.clock = clock
+        self._queue = []
+        self._due = {}
+        self._paces = {}
+        self._counter = itertools.count()
+
+    def add(self, token, delay=0):
+        """Ставит опрос подписчика через delay секунд."""
+        due = self.clock() + delay
+        self._due[token] = due
+        heapq.heappush(self._queue, (due, next(self._counter), token))
+
+    def add_spread(self, tokens):
+        """
+        Ставит подписчиков равномерно по периоду, чтобы запросы
+        не уходили одновременно. Порядок определяется хешем токена.
+        """
+        ordered = sorted(tokens, key=stable_fraction)
+        for rank, token in enumerate(ordered):
+            self.add(token, self.period * rank / len(ordered))
+
+    def remove(self, token):
+        """Снимает подписчика с расписания."""
+        self._due.pop(token, None)
+        self._paces.pop(token, None)
+
+    def interval(self, token):
+        """Текущий интервал опроса подписчика."""
+        pace = self._paces.get(token)
+        return self.period if pace is None else pace.interval
+
+    def _pace(self, token):
+        pace = self._paces.get(token)
+        if pace is None:
+            pace = self._paces[token] = Pace(self.period)
+        return pace
+
+    def _next_delay(self, token):
+        pace = self._paces.get(token)
+        if pace is None:
+            return self.period
+        if pace.postponed is not None:
+            delay, pace.postponed = pace.postponed, None
+            return delay
+        return pace.interval
+
+    def postpone(self, token, delay):
+        """Следующий опрос подписчика - через delay секунд, разово."""
+        self._pace(token).postponed = delay
+
+    def observe(self, token, active, reviewing, failed=False):
+        """
+        Учитывает результат опроса.
+        active - были новые статусы, reviewing - у подписчика есть
+        работа на проверке, failed - опрос закончился ошибкой.
+        """
+        pace = self._pace(token)
+        if failed:
+            pace.failures += 1
+            pace.interval = min(
+                self.max_period, self.period * 2 ** (pace.failures - 1)
+            )
+            return
+        if pace.failures:
+            pace.failures = 0
+            pace.interval = self.period
+        if reviewing:
+            pace.idle = 0
+            pace.interval = self.min_period
+        elif active:
+            pace.idle = 0
+            pace.interval = self.period
+        else:
+            pace.idle += 1
+            if pace.idle >= self.idle_polls:
+                pace.interval = min(
+                    self.max_period, int(pace.interval * self.factor)
+                )
+
+    def __contains__(self, token):
+        return token in self._due
+
+    def __len__(self):
+        return len(self._due)
+
+    def _drop_stale(self):
+        while self._queue:
+            due, _, token = self._queue[0]
+            if self._due.get(token) == due:
+                return
+            heapq.heappop(self._queue)
+
+    def pop_due(self):
+        """Возвращает токены, опрос которых уже пора выполнить."""
+        now = self.clock()
+        tokens = []
+        self._drop_stale()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, token = heapq.heappop(self._queue)
+            del self._due[token]
+            tokens.append(token)
+            self._drop_stale()
+        return tokens
+
+    def next_delay(self):
+        """Целое число секунд до ближайшего опроса."""
+        self._drop_stale()
+        if not self._queue:
+            return self.period
+        return max(0, math.ceil(self._queue[0][0] - self.clock()))
+
+    def run_pending(self, poll_many):
+        """
+        Опрашивает пачкой всех подписчиков, чьё время подошло.
+        Возвращает паузу до следующего запуска.
+        poll_many может вернуть токены, которые нужно снять с расписания.
+        """
+        tokens = self.pop_due()
+        dropped = ()
+        try:
+            if tokens:
+                dropped = set(poll_many(tokens) or ())
+        finally:
+            for token in tokens:
+                if token in dropped:
+                    self._paces.pop(token, None)
+                else:
+                    self.add(token, self._next_delay(token))
+        return self.next_delay()
@@ -0,0 +1,164 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def ring_hash(key):
+    """Позиция ключа на кольце: 64-битный blake2b."""
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def worker_name(index):
+    """Имя узла кольца для процесса-воркера."""
+    return f'worker-{index}'
+
+
+class HashRing:
+    """
+    Консистентное хеширование подписчиков по воркерам.
+    Каждый узел занимает replicas точек на кольце, поэтому при добавлении
+    или удалении воркера переезжает около 1/N подписчиков.
+    """
+
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._nodes = set()
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """Добавляет узел на кольцо."""
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self.replicas):
+            point = ring_hash(f'{node}#{replica}')
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node):
+        """Убирает узел с кольца."""
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        for replica in range(self.replicas):
+            point = ring_hash(f'{node}#{replica}')
+            del self._owners[point]
+            self._points.remove(point)
+
+    def owner(self, key):
+        """Узел, которому принадлежит ключ, или None для пустого кольца."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, ring_hash(key))
+        return self._owners[self._points[index % len(self._points)]]
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+class Supervisor:
+    """
+    Супервизор процессов-воркеров.
+    Запускает target(index) в отдельных процессах и перезапускает упавшие.
+    Первый перезапуск - сразу, при падениях подряд пауза перед
+    перезапуском растёт от base_delay вдвое до max_delay. Воркер,
+    проработавший stable_after секунд, снова перезапускается сразу.
+    """
+
+    def __init__(self, workers, target, context=None, base_delay=1,
+                 max_delay=60, stable_after=60, clock=time.monotonic):
+        self.workers = workers
+        self.target = target
+        self.context = context or multiprocessing.get_context('spawn')
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.clock = clock
+        self.processes = {}
+        self._started = {}
+        self._failures = {}
+        self._restart_at = {}
+
+    def spawn(self, index):
+        """Запускает процесс воркера с номером index."""
+        process = self.context.Process(
+            target=self.target, args=(index,), name=worker_name(index)
+        )
+        process.start()
+        self.processes[index] = process
+        self._started[index] = self.clock()
+        return process
+
+    def start(self):
+        """Запускает все воркеры."""
+        for index in range(self.workers):
+            self.spawn(index)
+
+    def restart_delay(self, index):
+        """Учитывает падение воркера и возвращает паузу до перезапуска."""
+        now = self.clock()
+        if now - self._started.get(index, now) >= self.stable_after:
+            self._failures[index] = 0
+        failures = self._failures[index] = self._failures.get(index, 0) + 1
+        if failures == 1:
+            return 0
+        return min(self.max_delay, self.base_delay * 2 ** (failures - 2))
+
+    def check(self):
+        """Перезапускает завершившиеся воркеры, возвращает их номера."""
+        restarted = []
+        now = self.clock()
+        for index, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            if index not in self._restart_at:
+                delay = self.restart_delay(index)
+                self._restart_at[index] = now + delay
+                logger.error(
+                    f'Воркер {worker_name(index)} завершился '
+                    f'с кодом {process.exitcode}, '
+                    f'перезапуск через {delay} с'
+                )
+            if now < self._restart_at[index]:
+                continue
+            del self._restart_at[index]
+            self.spawn(index)
+            restarted.append(index)
+        return restarted
+
+    def stop(self):
+        """
+        Останавливает все воркеры.
+        Воркерам уходит SIGTERM, и супервизор ждёт, пока они досылают
+        очередь и сохраняют состояние.
+        """
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join()
+        self.processes.clear()
+        self._restart_at.clear()
+
+    def run(self, interval=1.0, running=lambda: True):
+        """Следит за воркерами, пока running() истинно, или до прерывания."""
+        self.start()
+        try:
+            while True:
+                time.sleep(interval)
+                if not running():
+                    break
+                self.check()
+        finally:
+            self.stop()
@@ -0,0 +1,237 @@
+"""
+Локальный симулятор API Практикума для нагрузочного тестирования.
+
+Запуск:
+    python simulator.py --port 8080 --change-rate 6 --error-rate 0.01
+Бот направляется на симулятор переменной окружения:
+    PRACTICUM_ENDPOINT=http://127.0.0.1:8080/api/user_api/homework_statuses/
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PATH = '/api/user_api/homework_statuses/'
+NEXT_STATUSES = {
+    'reviewing': ('approved', 'rejected'),
+    'rejected': ('reviewing',),
+}
+
+
+def isoformat(timestamp):
+    """Время в формате date_updated из API."""
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class Student:
+    """Домашки одного токена, статусы которых меняются со временем."""
+
+    def __init__(self, token, homeworks, now):
+        self.random = random.Random(token)
+        self.updated = now
+        self.homeworks = [
+            {
+                'id': index + 1,
+                'homework_name': f'{token[:8]}__hw{index + 1}.zip',
+                'lesson_name': f'Спринт {index + 1}',
+                'reviewer_comment': '',
+                'status': self.random.choice(
+                    ('reviewing', 'approved', 'rejected')
+                ),
+                'date_updated': isoformat(now),
+                'updated': int(now),
+            }
+            for index in range(homeworks)
+        ]
+        self.lock = threading.Lock()
+
+    def advance(self, now, change_rate):
+        """
+        Меняет статусы домашек.
+        change_rate - среднее число смен статуса одной домашки в час.
+        """
+        with self.lock:
+            elapsed = now - self.updated
+            self.updated = now
+            probability = 1 - math.exp(-change_rate * elapsed / 3600)
+            for homework in self.homeworks:
+                choices = NEXT_STATUSES.get(homework['status'])
+                if choices and self.random.random() < probability:
+                    homework['status'] = self.random.choice(choices)
+                    homework['date_updated'] = isoformat(now)
+                    homework['updated'] = int(now)
+
+    def since(self, from_date):
+        """Домашки, изменившиеся не раньше from_date."""
+        with self.lock:
+            return [
+                {key: value for key, value in homework.items()
+                 if key != 'updated'}
+                for homework in self.homeworks
+                if homework['updated'] >= from_date
+            ]
+
+
+class Simulator:
+    """Состояние симулятора и параметры внедрения ошибок."""
+
+    def __init__(self, homeworks=3, change_rate=1.0, latency=0.0,
+                 error_rate=0.0, timeout_rate=0.0, timeout_delay=60.0,
+                 malformed_rate=0.0, seed=None):
+        self.homeworks = homeworks
+        self.change_rate = change_rate
+        self.latency = latency
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.students = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def student(self, token):
+        """Студент по токену; новые токены создаются на лету."""
+        with self.lock:
+            self.requests += 1
+            student = self.students.get(token)
+            if student is None:
+                student = self.students[token] = Student(
+                    token, self.homeworks, time.time()
+                )
+            return student
+
+    def fault(self):
+        """Случайная ошибка для ответа: 'error', 'timeout', 'malformed'."""
+        roll = self.random.random()
+        for name, rate in (('error', self.error_rate),
+                           ('timeout', self.timeout_rate),
+                           ('malformed', self.malformed_rate)):
+            if roll < rate:
+                return name
+            roll -= rate
+        return None
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов homework_statuses."""
+
+    protocol_version = 'HTTP/1.1'
+    simulator = None
+
+    def do_GET(self):
+        """Ответ в формате API Практикума."""
+        url = urlsplit(self.path)
+        if url.path != PATH:
+            return self.reply(HTTPStatus.NOT_FOUND, {'message': 'Not found'})
+        authorization = self.headers.get('Authorization', '')
+        if not authorization.startswith('OAuth '):
+            return self.reply(HTTPStatus.UNAUTHORIZED, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+                'source': '__response__',
+            })
+        try:
+            from_date = int(parse_qs(url.query).get('from_date', ['0'])[0])
+        except ValueError:
+            return self.reply(HTTPStatus.BAD_REQUEST, {
+                'code': 'UnknownError',
+                'error': {'error': 'Wrong from_date format'},
+            })
+        simulator = self.simulator
+        if simulator.latency:
+            time.sleep(simulator.random.expovariate(1 / simulator.latency))
+        fault = simulator.fault()
+        if fault == 'timeout':
+            time.sleep(simulator.timeout_delay)
+        if fault == 'error':
+            return self.reply(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+        if fault == 'malformed':
+            return self.reply(HTTPStatus.OK, raw=b'{"homeworks": [')
+        now = time.time()
+        student = simulator.student(authorization[len('OAuth '):])
+        student.advance(now, simulator.change_rate)
+        return self.reply(HTTPStatus.OK, {
+            'homeworks': student.since(from_date),
+            'current_date': int(now),
+        })
+
+    def reply(self, status, data=None, raw=None):
+        """Отправляет json-ответ."""
+        body = raw if raw is not None else json.dumps(
+            data, ensure_ascii=False
+        ).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Запросы не логируются."""
+
+
+def make_server(simulator, host='127.0.0.1', port=0):
+    """Создаёт сервер симулятора; port=0 - любой свободный порт."""
+    handler = type(
+        'BoundSimulatorHandler', (SimulatorHandler,), {'simulator': simulator}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def endpoint(server):
+    """Адрес эндпоинта для PRACTICUM_ENDPOINT."""
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}{PATH}'
+
+
+def parse_args(argv=None):
+    """Параметры симулятора."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--homeworks', type=int, default=3)
+    parser.add_argument('--change-rate', type=float, default=1.0,
+                        help='смен статуса одной домашки в час')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='средняя задержка ответа, с')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-delay', type=float, default=60.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Запускает симулятор до прерывания."""
+    args = parse_args(argv)
+    simulator = Simulator(
+        homeworks=args.homeworks,
+        change_rate=args.change_rate,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout_delay,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+    server = make_server(simulator, args.host, args.port)
+    print(f'Симулятор API: {endpoint(server)}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
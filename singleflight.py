@@ -0,0 +1,93 @@
+import threading
+import time
+
+
+PRUNE_THRESHOLD = 1024
+
+
+class Call:
+    """Выполняющийся запрос, результат которого ждут другие потоки."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Объединение одновременных вызовов с одинаковым ключом.
+    Пока запрос по ключу выполняется, остальные вызовы ждут его и получают
+    тот же результат или то же исключение. Успешный результат ещё
+    freshness секунд отдаётся из памяти без нового запроса.
+    """
+
+    def __init__(self, freshness=0, clock=time.monotonic):
+        self.freshness = freshness
+        self.clock = clock
+        self.calls = 0
+        self.shared = 0
+        self.fresh = 0
+        self._calls = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """Вызывает func(*args) не больше одного раза на ключ за раз."""
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and self.clock() < cached[0]:
+                self.fresh += 1
+                return cached[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.freshness > 0:
+                    self._results[key] = (
+                        self.clock() + self.freshness, call.result
+                    )
+                    self._prune()
+            call.done.set()
+        return call.result
+
+    def forget(self, key):
+        """Убирает сохранённый результат ключа."""
+        with self._lock:
+            self._results.pop(key, None)
+
+    def _prune(self):
+        if len(self._results) <= PRUNE_THRESHOLD:
+            return
+        now = self.clock()
+        self._results = {
+            key: item for key, item in self._results.items()
+            if item[0] > now
+        }
+
+    def stats(self):
+        """Запросы, объединённые с выполняющимися и отданные из памяти."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'fresh': self.fresh,
+            }
@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import sys
+import threading
+
+from models import SubscriberState
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS subscribers (
+    token TEXT PRIMARY KEY,
+    timestamp INTEGER,
+    last_message TEXT NOT NULL DEFAULT '',
+    statuses TEXT NOT NULL DEFAULT '{}'
+)
+'''
+
+PENDING_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pending (
+    id INTEGER PRIMARY KEY,
+    shard TEXT NOT NULL DEFAULT '',
+    chat_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    keys TEXT NOT NULL DEFAULT '[]'
+)
+'''
+
+
+class StateStore:
+    """
+    Хранилище состояния подписчиков в SQLite: курсор from_date,
+    последнее сообщение и последние отправленные статусы домашек,
+    а также сообщения, не отправленные до остановки.
+    Путь ':memory:' - хранилище без сохранения между запусками.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        if path != ':memory:':
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(SCHEMA)
+        self._connection.execute(PENDING_SCHEMA)
+
+    def load(self, token):
+        """Состояние подписчика или None, если оно не сохранялось."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT timestamp, last_message, statuses '
+                'FROM subscribers WHERE token = ?',
+                (token,),
+            ).fetchone()
+        if row is None:
+            return None
+        timestamp, last_message, statuses = row
+        statuses = {
+            key: sys.intern(status) if type(status) is str else status
+            for key, status in json.loads(statuses).items()
+        }
+        return SubscriberState(timestamp, last_message, statuses)
+
+    def save_many(self, items):
+        """Сохраняет пары (токен, состояние) одной транзакцией."""
+        rows = [
+            (
+                token,
+                state.timestamp,
+                state.last_message,
+                json.dumps(state.statuses, ensure_ascii=False),
+            )
+            for token, state in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._connection.execute('BEGIN')
+            try:
+                self._connection.executemany(
+                    'INSERT INTO subscribers '
+                    '(token, timestamp, last_message, statuses) '
+                    'VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(token) DO UPDATE SET '
+                    'timestamp = excluded.timestamp, '
+                    'last_message = excluded.last_message, '
+                    'statuses = excluded.statuses',
+                    rows,
+                )
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def save(self, token, state):
+        """Сохраняет состояние одного подписчика."""
+        self.save_many([(token, state)])
+
+    def delete(self, token):
+        """Удаляет состояние отписавшегося подписчика."""
+        with self._lock:
+            self._connection.execute(
+                'DELETE FROM subscribers WHERE token = ?', (token,)
+            )
+
+    def save_pending(self, envelopes, shard=''):
+        """
+        Сохраняет неотправленные конверты очереди шарда shard.
+        Их заберёт следующий держатель шарда.
+        """
+        rows = [
+            (
+                shard,
+                envelope.chat_id,
+                '\n\n'.join(envelope.texts),
+                json.dumps([key.hex() for key in envelope.keys]),
+            )
+            for envelope in envelopes
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._connection.executemany(
+                'INSERT INTO pending (shard, chat_id, text, keys) '
+                'VALUES (?, ?, ?, ?)',
+                rows,
+            )
+
+    def take_pending(self, shard=''):
+        """
+        Забирает сохранённые сообщения шарда: (chat_id, текст, ключи).
+        Выборка и удаление идут в одной транзакции, поэтому при общей базе
+        сообщение достаётся только одному экземпляру, а строки других
+        шардов не трогаются. Пустая очередь проверяется без блокировки
+        базы на запись: метод вызывается в каждом цикле.
+        """
+        with self._lock:
+            if self._connection.execute(
+                'SELECT 1 FROM pending WHERE shard = ? LIMIT 1', (shard,)
+            ).fetchone() is None:
+                return []
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._connection.execute(
+                    'SELECT chat_id, text, keys FROM pending '
+                    'WHERE shard = ? ORDER BY id',
+                    (shard,),
+                ).fetchall()
+                self._connection.execute(
+                    'DELETE FROM pending WHERE shard = ?', (shard,)
+                )
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+        return [
+            (chat_id, text, [bytes.fromhex(key) for key in json.loads(keys)])
+            for chat_id, text, keys in rows
+        ]
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
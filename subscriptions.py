@@ -0,0 +1,108 @@
+import json
+import os
+
+from models import Subscription
+
+
+class SubscriptionRegistry:
+    """
+    Реестр подписчиков: токен Практикума -> id чата в Telegram.
+    Хранится в локальном json-файле вида {"<token>": <chat_id>}.
+    """
+
+    def __init__(self, path=None, subscriptions=None):
+        self.path = path
+        self._chats = {}
+        for subscription in subscriptions or ():
+            self._chats[subscription.token] = subscription.chat_id
+
+    @classmethod
+    def load(cls, path):
+        """Загружает реестр из файла. Отсутствующий файл - пустой реестр."""
+        registry = cls(path)
+        if not os.path.exists(path):
+            return registry
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise TypeError('Файл подписок должен содержать словарь')
+        for token, chat_id in data.items():
+            registry._chats[token] = chat_id
+        return registry
+
+    def save(self):
+        """Атомарно записывает реестр обратно в файл."""
+        if self.path is None:
+            return
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self._chats, file, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def add(self, token, chat_id):
+        """Добавляет или обновляет подписку."""
+        self._chats[token] = chat_id
+        return Subscription(token, chat_id)
+
+    def remove(self, token):
+        """Удаляет подписку, если она есть."""
+        return self._chats.pop(token, None) is not None
+
+    def get(self, token):
+        """Возвращает подписку по токену или None."""
+        chat_id = self._chats.get(token)
+        if chat_id is None:
+            return None
+        return Subscription(token, chat_id)
+
+    def select(self, predicate):
+        """
+        Новый реестр из подписок, токены которых подходят под predicate.
+        Выборка не привязана к файлу, чтобы save() не затёр чужие подписки.
+        """
+        return SubscriptionRegistry(subscriptions=[
+            subscription for subscription in self
+            if predicate(subscription.token)
+        ])
+
+    def replace(self, other):
+        """Заменяет подписки содержимым другого реестра, путь не меняется."""
+        self._chats = dict(other._chats)
+
+    def __contains__(self, token):
+        return token in self._chats
+
+    def __len__(self):
+        return len(self._chats)
+
+    def __iter__(self):
+        for token, chat_id in self._chats.items():
+            yield Subscription(token, chat_id)
+
+
+class RegistryWatcher:
+    """
+    Следит за файлом подписок.
+    Файл меняют команды /subscribe и /unsubscribe в другом процессе или
+    администратор; изменение видно по времени изменения, размеру и inode.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._signature = self.signature()
+
+    def signature(self):
+        """Отпечаток файла или None, если файла нет."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def changed(self):
+        """Перечитанный реестр, если файл изменился, иначе None."""
+        signature = self.signature()
+        if signature == self._signature:
+            return None
+        self._signature = signature
+        return SubscriptionRegistry.load(self.path)
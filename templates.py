@@ -0,0 +1,142 @@
+import functools
+import html
+import string
+from collections import namedtuple
+
+
+DEFAULT_LOCALE = 'ru'
+
+LOCALES = {
+    'ru': {
+        'status': 'Изменился статус проверки работы "{name!b}". {verdict}',
+        'api_error': 'Проблема в работе API: {error}.',
+        'response_error': 'Ошибка в обработке ответа: {error}.',
+        'error': 'Что-то пошло не так: {error}',
+    },
+    'en': {
+        'status': 'Review status of "{name!b}" has changed. {verdict}',
+        'api_error': 'API problem: {error}.',
+        'response_error': 'Failed to process the response: {error}.',
+        'error': 'Something went wrong: {error}',
+        'verdicts': {
+            'approved': 'The reviewer approved the work. Hooray!',
+            'reviewing': 'The reviewer has started checking the work.',
+            'rejected': 'The reviewer left some remarks.',
+        },
+    },
+}
+
+MARKDOWN_V2_ESCAPES = str.maketrans(
+    {char: f'\\{char}' for char in '_*[]()~`>#+-=|{}.!\\'}
+)
+MARKDOWN_ESCAPES = str.maketrans({char: f'\\{char}' for char in '_*`['})
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'currsize'))
+
+
+def escape_markdown_v2(text):
+    """Экранирует служебные символы MarkdownV2."""
+    return text.translate(MARKDOWN_V2_ESCAPES)
+
+
+def escape_markdown(text):
+    """Экранирует служебные символы устаревшего Markdown."""
+    return text.translate(MARKDOWN_ESCAPES)
+
+
+def escape_html(text):
+    """Экранирует <, > и & для режима HTML."""
+    return html.escape(text, quote=False)
+
+
+# parse_mode Telegram -> (экранирование, открывающая и закрывающая
+# разметка для полей с пометкой !b).
+PARSE_MODES = {
+    None: (str, '', ''),
+    'HTML': (escape_html, '<b>', '</b>'),
+    'MarkdownV2': (escape_markdown_v2, '*', '*'),
+    'Markdown': (escape_markdown, '*', '*'),
+}
+
+
+def compile_template(template, parse_mode=None):
+    """
+    Разбирает шаблон один раз.
+    Текст шаблона сразу экранируется под parse_mode, поля с пометкой !b
+    оборачиваются разметкой. Результат - строка для str.format, при
+    отрисовке экранируются только подставленные значения.
+    """
+    escape, bold_open, bold_close = PARSE_MODES[parse_mode]
+    parts = []
+    for literal, field, _, conversion in string.Formatter().parse(template):
+        if literal:
+            parts.append(
+                escape(literal).replace('{', '{{').replace('}', '}}')
+            )
+        if field is None:
+            continue
+        if conversion == 'b':
+            parts.append(f'{bold_open}{{{field}}}{bold_close}')
+        else:
+            parts.append(f'{{{field}}}')
+    return ''.join(parts)
+
+
+class MessageRenderer:
+    """
+    Тексты уведомлений по заранее разобранным шаблонам локали.
+    Одинаковые сообщения (ошибки, повторяющиеся названия) берутся из
+    ограниченного LRU-кеша, поэтому стоимость отрисовки не растёт
+    с числом уведомлений за цикл.
+    verdicts - вердикты по умолчанию, локаль может их переопределить.
+    """
+
+    def __init__(self, locale=DEFAULT_LOCALE, parse_mode=None,
+                 verdicts=None, cache_size=4096):
+        if locale not in LOCALES:
+            raise ValueError(f'Неизвестная локаль сообщений: {locale}')
+        if parse_mode not in PARSE_MODES:
+            raise ValueError(f'Неизвестный parse_mode: {parse_mode}')
+        messages = LOCALES[locale]
+        self.locale = locale
+        self.parse_mode = parse_mode
+        self.escape = PARSE_MODES[parse_mode][0]
+        verdicts = {**(verdicts or {}), **messages.get('verdicts', {})}
+        self.verdicts = {
+            status: self.escape(verdict)
+            for status, verdict in verdicts.items()
+        }
+        self.templates = {
+            name: compile_template(template, parse_mode).format
+            for name, template in messages.items()
+            if isinstance(template, str)
+        }
+        cache = functools.lru_cache(maxsize=cache_size)
+        self._status = cache(self._render_status)
+        self._error = cache(self._render_error)
+
+    def _render_status(self, homework_name, status):
+        return self.templates['status'](
+            name=self.escape(homework_name), verdict=self.verdicts[status]
+        )
+
+    def _render_error(self, name, error):
+        return self.templates[name](error=self.escape(error))
+
+    def status(self, homework_name, status):
+        """Уведомление о новом статусе домашки."""
+        return self._status(str(homework_name), status)
+
+    def error(self, name, error):
+        """Сообщение об ошибке по шаблону name."""
+        return self._error(name, str(error))
+
+    def cache_info(self):
+        """Суммарная статистика LRU-кешей отрисованных сообщений."""
+        status = self._status.cache_info()
+        error = self._error.cache_info()
+        return CacheInfo(
+            status.hits + error.hits,
+            status.misses + error.misses,
+            status.currsize + error.currsize,
+        )
@@ -0,0 +1,157 @@
+"""
+Бенчмарк цепочки get_api_answer -> check_response -> parse_status ->
+send_message для N подписчиков на заглушках из tests/utils.py.
+Задержка доставки считается для каждого сообщения: от постановки
+уведомления в очередь до отправки.
+
+Запуск из корня репозитория:
+    python tests/bench_pipeline.py --tenants 1000 --api-latency 0.05
+"""
+import argparse
+import logging
+import os
+import random
+import resource
+import sys
+import time
+from http import HTTPStatus
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault(
+    'LOG_LEVELS', '__main__=WARNING,homework=WARNING,outbox=WARNING'
+)
+
+import homework  # noqa: E402
+import requests  # noqa: E402
+import utils  # noqa: E402
+from breaker import CircuitBreaker  # noqa: E402
+from models import Subscription  # noqa: E402
+from outbox import Outbox  # noqa: E402
+from pipeline import AsyncPipeline  # noqa: E402
+from scheduler import PollScheduler  # noqa: E402
+from state import StateStore  # noqa: E402
+from subscriptions import SubscriptionRegistry  # noqa: E402
+
+
+STATUSES = tuple(homework.HOMEWORK_VERDICTS)
+
+
+def mock_api(latency, homeworks_per_tenant):
+    """Заглушка requests.get: задержка и случайные статусы домашек."""
+    def mocked_get(url, headers=None, params=None, **kwargs):
+        time.sleep(latency)
+        response = utils.MockResponseGET(
+            random_timestamp=int(time.time()), http_status=HTTPStatus.OK
+        )
+        token = headers['Authorization']
+        data = {
+            'homeworks': [
+                {
+                    'id': index,
+                    'homework_name': f'{token}_hw{index}',
+                    'status': random.choice(STATUSES),
+                    'date_updated': '2020-02-13T14:40:57Z',
+                }
+                for index in range(homeworks_per_tenant)
+            ],
+            'current_date': int(time.time()),
+        }
+        response.json = lambda: data
+        return response
+    return mocked_get
+
+
+class SlowTelegramBot(utils.MockTelegramBot):
+    """Заглушка бота с задержкой отправки."""
+
+    def __init__(self, latency, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        time.sleep(self.latency)
+        super().send_message(chat_id, text, **kwargs)
+
+
+class TimedOutbox(Outbox):
+    """
+    Очередь, запоминающая задержку каждого отправленного сообщения:
+    от постановки уведомления в очередь до успешной отправки.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(clock=time.perf_counter, **kwargs)
+        self.latencies = []
+
+    def done(self, envelope, error=None, retry_after=None):
+        if error is None:
+            self.latencies.append(self.clock() - envelope.enqueued)
+        super().done(envelope, error, retry_after)
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(args):
+    """Один полный цикл опроса всех подписчиков и доставки уведомлений."""
+    requests.get = mock_api(args.api_latency, args.homeworks)
+    logging.disable(logging.CRITICAL)
+    bot = SlowTelegramBot(args.send_latency)
+    registry = SubscriptionRegistry(subscriptions=[
+        Subscription(f'token{index}', index)
+        for index in range(args.tenants)
+    ])
+    scheduler = PollScheduler(homework.RETRY_PERIOD)
+    breaker = CircuitBreaker()
+    homework.transport.configure(0, homework.API_TIMEOUT, breaker=breaker)
+    poller = homework.Poller(
+        bot,
+        registry,
+        scheduler,
+        breaker,
+        AsyncPipeline(args.concurrency),
+        StateStore(),
+        TimedOutbox(global_rate=args.telegram_rate, chat_interval=0),
+    )
+    tokens = [subscription.token for subscription in registry]
+
+    started = time.perf_counter()
+    poller.poll_many(tokens)
+    polled = time.perf_counter()
+    while len(poller.outbox):
+        delay = poller.flush()
+        if delay:
+            time.sleep(min(delay, 0.01))
+    finished = time.perf_counter()
+
+    latencies = poller.outbox.latencies
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'подписчиков:         {args.tenants}')
+    print(f'запросов к API/с:    {args.tenants / (polled - started):.1f}')
+    print(f'уведомлений:         {len(latencies)}')
+    print(f'полный цикл, с:      {finished - started:.3f}')
+    print(f'задержка p50, с:     {percentile(latencies, 0.5):.3f}')
+    print(f'задержка p99, с:     {percentile(latencies, 0.99):.3f}')
+    print(f'пиковый RSS, МБ:     {rss_mb:.1f}')
+
+
+def parse_args(argv=None):
+    """Параметры бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--homeworks', type=int, default=3)
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    parser.add_argument('--send-latency', type=float, default=0.01)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--telegram-rate', type=float, default=1e9)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    run(parse_args())
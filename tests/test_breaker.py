@@ -0,0 +1,44 @@
+from breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from utils import FakeClock
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN, (
+            'Предохранитель должен открываться после порога ошибок подряд.'
+        )
+        assert not breaker.allow()
+
+    def test_half_open_lets_one_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, base_delay=10,
+                                 clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow(), (
+            'В полуоткрытом состоянии пропускается только один запрос.'
+        )
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_backoff_doubles_up_to_max(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, base_delay=10,
+                                 max_delay=25, clock=clock)
+        delays = []
+        for _ in range(3):
+            breaker.record_failure()
+            delays.append(breaker.retry_in())
+            clock.now += delays[-1]
+            assert breaker.allow()
+        assert delays == [10, 20, 25], (
+            'Пауза предохранителя должна удваиваться до max_delay.'
+        )
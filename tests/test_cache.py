@@ -0,0 +1,111 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from cache import ResponseCache, content_digest
+
+
+def body(homeworks, current_date):
+    return json.dumps(
+        {'homeworks': homeworks, 'current_date': current_date}
+    ).encode()
+
+
+HOMEWORKS = [{'id': 1, 'homework_name': 'hw', 'status': 'approved'}]
+
+
+class FakeResponse:
+
+    def __init__(self, status_code=HTTPStatus.OK, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TestContentDigest:
+
+    def test_current_date_is_ignored(self):
+        assert content_digest(body(HOMEWORKS, 100)) == content_digest(
+            body(HOMEWORKS, 200)
+        ), 'current_date меняется в каждом ответе и не должен влиять на хеш'
+
+    def test_homeworks_change_digest(self):
+        assert content_digest(body(HOMEWORKS, 100)) != content_digest(
+            body([], 100)
+        )
+
+    def test_empty_body(self):
+        assert content_digest(b'') is None
+
+
+class TestResponseCache:
+
+    def test_entry_survives_from_date_change(self):
+        cache = ResponseCache(10)
+        cache.store('token', {'ETag': '"v1"'}, b'digest', {'homeworks': []})
+        assert cache.validators('token') == {'If-None-Match': '"v1"'}
+        assert cache.not_modified('token', b'digest') == {'homeworks': []}
+        assert cache.not_modified('token', b'other') is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(2)
+        for token in ('a', 'b', 'c'):
+            cache.store(token, {}, None, {})
+        assert len(cache) == 2
+        assert cache.lookup('a') is None
+
+    def test_forget(self):
+        cache = ResponseCache(2)
+        cache.store('token', {}, None, {})
+        cache.forget('token')
+        assert cache.not_modified('token') is None
+
+
+class TestConditionalRequests:
+
+    @pytest.fixture
+    def responses(self, monkeypatch, homework_module):
+        monkeypatch.setattr(
+            homework_module, 'response_cache', ResponseCache(10)
+        )
+        queue = []
+        sent = []
+
+        def get(url, headers=None, params=None):
+            sent.append((dict(headers), dict(params)))
+            return queue.pop(0)
+
+        monkeypatch.setattr(homework_module.transport, 'get', get)
+        return queue, sent
+
+    def test_unchanged_tenant_gets_304(self, homework_module, responses):
+        queue, sent = responses
+        queue.append(FakeResponse(
+            content=body(HOMEWORKS, 1000), headers={'ETag': '"v1"'}
+        ))
+        queue.append(FakeResponse(HTTPStatus.NOT_MODIFIED))
+        answer, changed = homework_module.fetch_statuses('token', 100)
+        assert changed
+        cached, changed = homework_module.fetch_statuses('token', 940)
+        assert sent[1][0].get('If-None-Match') == '"v1"', (
+            'После сдвига from_date запрос должен остаться условным'
+        )
+        assert sent[1][1] == {'from_date': 940}
+        assert not changed and cached == answer
+
+    def test_unchanged_tenant_hits_digest(self, homework_module, responses):
+        queue, _ = responses
+        queue.append(FakeResponse(content=body(HOMEWORKS, 1000)))
+        queue.append(FakeResponse(content=body(HOMEWORKS, 1600)))
+        queue.append(FakeResponse(content=body([], 2200)))
+        assert homework_module.fetch_statuses('token', 100)[1]
+        assert not homework_module.fetch_statuses('token', 940)[1], (
+            'Ответ, отличающийся только current_date, не считается новым'
+        )
+        assert homework_module.fetch_statuses('token', 940)[1]
+        assert homework_module.response_cache.hits == 1
@@ -0,0 +1,198 @@
+import threading
+import time
+
+import pytest
+import telegram
+
+import fake_telegram
+from commands import CommandHandler, UpdateListener
+from models import SubscriberState, Subscription
+from sharding import HashRing, worker_name
+from subscriptions import SubscriptionRegistry
+from templates import MessageRenderer
+
+
+def make_handler(states=None, path=None):
+    registry = SubscriptionRegistry(path, [Subscription('token1234', 1)])
+    states = states or {}
+    return CommandHandler(registry, states.get)
+
+
+@pytest.fixture
+def fake_api():
+    api = fake_telegram.FakeTelegram(chat_interval=0)
+    server = fake_telegram.make_server(api)
+    threading.Thread(
+        target=server.serve_forever, args=(0.05,), daemon=True
+    ).start()
+    yield api, fake_telegram.base_url(server)
+    server.shutdown()
+    server.server_close()
+
+
+class TestCommandHandler:
+
+    def test_not_a_command(self):
+        assert make_handler().dispatch(1, 'привет') is None
+
+    def test_unknown_command(self):
+        assert 'Неизвестная команда' in make_handler().dispatch(1, '/foo')
+
+    def test_status_from_cached_state(self):
+        state = SubscriberState(
+            0,
+            'Изменился статус проверки работы "hw.zip". Ура!',
+            {'1': 'approved', '2': 'reviewing', '3': 'approved'},
+        )
+        reply = make_handler({'token1234': state}).dispatch(1, '/status')
+        assert 'на проверке: 1' in reply and 'принято: 2' in reply
+        assert 'hw.zip' in reply, (
+            'Ответ на /status должен содержать последнее уведомление.'
+        )
+
+    def test_status_keeps_notification_markup(self):
+        renderer = MessageRenderer(
+            parse_mode='HTML', verdicts={'approved': 'Ура!'}
+        )
+        state = SubscriberState(
+            0, renderer.status('a<b>.zip', 'approved'), {'1': 'approved'},
+        )
+        registry = SubscriptionRegistry(None, [Subscription('token1234', 1)])
+        handler = CommandHandler(
+            registry, {'token1234': state}.get, escape=renderer.escape
+        )
+        reply = handler.dispatch(1, '/status')
+        assert '<b>a&lt;b&gt;.zip</b>' in reply, (
+            'Последнее уведомление уже размечено и не экранируется повторно.'
+        )
+        assert '/foo&lt;b&gt;' in handler.dispatch(1, '/foo<b>'), (
+            'Собственный текст ответа экранируется под parse_mode.'
+        )
+
+    def test_status_before_first_poll(self):
+        reply = make_handler().dispatch(1, '/status')
+        assert 'ещё не получены' in reply
+
+    def test_status_not_subscribed(self):
+        assert 'не подписаны' in make_handler().dispatch(2, '/status')
+
+    def test_subscribe_and_unsubscribe(self, tmp_path):
+        path = str(tmp_path / 'subscriptions.json')
+        handler = make_handler(path=path)
+        assert 'Укажите токен' in handler.dispatch(2, '/subscribe')
+        handler.dispatch(2, '/subscribe@homework_bot newtoken')
+        assert SubscriptionRegistry.load(path).get('newtoken') == (
+            Subscription('newtoken', 2)
+        ), 'Подписка должна сохраняться в файл.'
+        assert handler.drain_new() == ['newtoken']
+        assert handler.drain_new() == []
+        handler.dispatch(2, '/unsubscribe')
+        assert 'newtoken' not in SubscriptionRegistry.load(path)
+
+    def test_subscribe_does_not_take_token_from_other_chat(self, tmp_path):
+        handler = make_handler(path=str(tmp_path / 'subscriptions.json'))
+        reply = handler.dispatch(2, '/subscribe token1234')
+        assert 'другой чат' in reply
+        assert handler.registry.get('token1234').chat_id == 1, (
+            'Токен не должен молча переходить к другому чату.'
+        )
+        assert handler.drain_new() == []
+
+    def test_subscribe_disabled_without_file(self):
+        handler = make_handler()
+        assert 'Неизвестная команда' in handler.dispatch(2, '/subscribe t')
+        assert '/subscribe' not in handler.dispatch(2, '/help'), (
+            'Без файла подписок подписка пропала бы при перезапуске.'
+        )
+
+
+class FakeScheduler:
+
+    def __init__(self):
+        self.added = []
+
+    def add(self, token, delay=0):
+        self.added.append(token)
+
+
+class TestWorkerSubscriptions:
+
+    def test_other_worker_picks_up_changes(self, homework_module,
+                                           monkeypatch, tmp_path):
+        path = str(tmp_path / 'subscriptions.json')
+        SubscriptionRegistry(path, [Subscription('token1234', 1)]).save()
+        monkeypatch.setattr(homework_module, 'SUBSCRIPTIONS_FILE', path)
+        monkeypatch.setattr(homework_module, 'WORKERS', 2)
+        monkeypatch.setattr(homework_module, 'WORKER_INDEX', 1)
+        ring = HashRing(worker_name(number) for number in range(2))
+        token = next(
+            f'token{number}' for number in range(100)
+            if ring.owner(f'token{number}') == worker_name(1)
+        )
+        watcher = homework_module.make_watcher()
+        poller = homework_module.Poller(
+            None,
+            homework_module.shard_subscriptions(
+                homework_module.load_subscriptions(), 1, 2
+            ),
+            FakeScheduler(), None, None, None, None,
+        )
+        handler = CommandHandler(SubscriptionRegistry.load(path), {}.get)
+
+        handler.dispatch(7, f'/subscribe {token}')
+        homework_module.sync_subscriptions(watcher, poller)
+        assert poller.registry.get(token) == Subscription(token, 7), (
+            'Воркер-владелец должен получить подписку из файла.'
+        )
+        assert poller.scheduler.added == [token]
+
+        handler.dispatch(7, '/unsubscribe')
+        homework_module.sync_subscriptions(watcher, poller)
+        assert token not in poller.registry, (
+            'После /unsubscribe воркер-владелец не должен опрашивать токен.'
+        )
+
+
+class RecordingBot:
+
+    def __init__(self, updates):
+        self.updates = updates
+        self.sent = []
+
+    def get_updates(self, **kwargs):
+        updates, self.updates = self.updates, []
+        return updates
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, kwargs))
+
+
+class TestUpdateListener:
+
+    def test_reply_uses_parse_mode(self):
+        update = telegram.Update(
+            1, message=telegram.Message(
+                1, None, telegram.Chat(1, 'private'), text='/status'
+            ),
+        )
+        bot = RecordingBot([update])
+        UpdateListener(bot, make_handler(), parse_mode='HTML').poll_once()
+        assert bot.sent[0][2] == {'parse_mode': 'HTML'}, (
+            'Ответ на команду размечен под parse_mode уведомлений.'
+        )
+
+    def test_answers_command_without_api_call(self, fake_api):
+        api, base_url = fake_api
+        bot = telegram.Bot(token='1234:abcdefg', base_url=base_url)
+        listener = UpdateListener(bot, make_handler(), timeout=1)
+        listener.start()
+        started = time.monotonic()
+        api.push_message(1, '/status')
+        while not api.delivered['1'] and time.monotonic() - started < 5:
+            time.sleep(0.01)
+        listener.stop()
+        assert time.monotonic() - started < 1, (
+            'Ответ на команду должен приходить быстрее секунды.'
+        )
+        assert 'ещё не получены' in api.delivered['1'][0]
+        assert listener.offset == 2
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from cursor import CursorManager
+from models import SubscriberState, Subscription
+
+
+NOW = 1_700_000_000
+
+
+def make_cursors(**kwargs):
+    return CursorManager(clock=lambda: NOW, **kwargs)
+
+
+class TestCursorManager:
+
+    def test_cursor_lags_behind_current_date_by_overlap(self):
+        cursors = make_cursors(overlap=60)
+        assert cursors.advance(NOW - 3600, NOW) == NOW - 60, (
+            'Курсор должен отставать от current_date на окно перекрытия'
+        )
+
+    def test_cursor_never_moves_back(self):
+        cursors = make_cursors(overlap=60)
+        assert cursors.advance(NOW, NOW - 3600) == NOW, (
+            'current_date из прошлого не должен откатывать курсор'
+        )
+
+    @pytest.mark.parametrize('current_date', [
+        None, 'завтра', True, [NOW], NOW + 10 * 86400,
+        float('nan'), float('-inf'),
+    ])
+    def test_invalid_current_date_keeps_cursor(self, current_date, caplog):
+        cursors = make_cursors()
+        assert cursors.advance(NOW - 3600, current_date) == NOW - 3600, (
+            'Неверный current_date не должен сдвигать курсор'
+        )
+        assert 'current_date' in caplog.text, (
+            'Неверный current_date нужно залогировать'
+        )
+
+    def test_numeric_string_current_date_is_accepted(self):
+        cursors = make_cursors(overlap=0)
+        assert cursors.advance(NOW - 3600, str(NOW)) == NOW
+
+    @pytest.mark.parametrize('cursor', [None, 'abc', True])
+    def test_broken_cursor_falls_back_to_initial_window(self, cursor):
+        cursors = make_cursors(initial_window=100)
+        assert cursors.restore(cursor) == NOW - 100
+        assert cursors.advance(cursor, None) == NOW - 100
+
+
+class TestProcessResponse:
+
+    def test_overlap_does_not_repeat_notifications(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'cursors', make_cursors(overlap=60))
+        subscription = Subscription('token', 1)
+        state = SubscriberState(NOW - 3600)
+        response = {
+            'homeworks': [{
+                'id': 1,
+                'homework_name': 'hw',
+                'status': 'approved',
+                'date_updated': '2023-11-14T22:12:00Z',
+            }],
+            'current_date': NOW,
+        }
+        first = homework.process_response(subscription, state, response)
+        assert state.timestamp == NOW - 60
+        second = homework.process_response(subscription, state, response)
+        assert len(first) == 1 and second == [], (
+            'Домашка из окна перекрытия не должна уведомлять повторно'
+        )
+
+    def test_missing_current_date_keeps_timestamp(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'cursors', make_cursors())
+        state = SubscriberState(NOW - 3600)
+        homework.process_response(
+            Subscription('token', 1), state, {'homeworks': []}
+        )
+        assert state.timestamp == NOW - 3600, (
+            'Без current_date следующий запрос должен уйти с прежним from_date'
+        )
+
+    def test_nan_current_date_keeps_notifications(self, monkeypatch):
+        import homework
+
+        monkeypatch.setattr(homework, 'cursors', make_cursors())
+        state = SubscriberState(NOW - 3600)
+        response = json.loads(
+            '{"homeworks": [{"id": 1, "homework_name": "hw", '
+            '"status": "approved"}], "current_date": NaN}'
+        )
+        notifications = homework.process_response(
+            Subscription('token', 1), state, homework.compact_answer(response)
+        )
+        assert len(notifications) == 1, (
+            'NaN в current_date не должен терять уведомления о статусах'
+        )
+        assert state.timestamp == NOW - 3600
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import decoder
+from decoder import JsonDecoder
+
+
+HOMEWORK = {
+    'id': 1,
+    'homework_name': 'hw.zip',
+    'lesson_name': 'Спринт 1',
+    'reviewer_comment': 'Замечания',
+    'status': 'approved',
+    'date_updated': '2022-01-01T00:00:00Z',
+}
+ANSWER = {'homeworks': [HOMEWORK], 'current_date': 1}
+
+
+class ContentResponse:
+
+    def __init__(self, data):
+        self.content = json.dumps(data, ensure_ascii=False).encode()
+
+
+class JsonResponse:
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class TestJsonDecoder:
+
+    @pytest.mark.parametrize('backend', sorted(decoder.BACKENDS))
+    def test_backends_agree(self, backend):
+        assert JsonDecoder(backend).decode(ContentResponse(ANSWER)) == ANSWER
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            JsonDecoder('yaml')
+
+    def test_falls_back_to_response_json(self):
+        assert JsonDecoder().decode(JsonResponse(ANSWER)) == ANSWER, (
+            'Без response.content нужно использовать response.json().'
+        )
+
+    def test_malformed_body(self):
+        response = ContentResponse(ANSWER)
+        response.content = b'{"homeworks": ['
+        with pytest.raises(ValueError):
+            JsonDecoder().decode(response)
@@ -0,0 +1,138 @@
+import asyncio
+
+from dedup import BloomFilter, DedupIndex, dedup_key
+from models import Notification
+from outbox import Outbox
+from utils import FakeClock
+
+
+KEY = dedup_key('token', 1, 'approved', '2022-01-01T00:00:00Z')
+
+
+class TestBloomFilter:
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        keys = [dedup_key('token', index, 'approved', '') for index in
+                range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for index in range(1000):
+            bloom.add(dedup_key('token', index, 'approved', ''))
+        false_positives = sum(
+            dedup_key('other', index, 'approved', '') in bloom
+            for index in range(10000)
+        )
+        assert false_positives < 300
+
+
+class TestDedupIndex:
+
+    def test_key_fields(self):
+        assert KEY != dedup_key('token', 1, 'approved', '2022-01-02T00:00:00Z')
+        assert KEY != dedup_key('token', 1, 'rejected', '2022-01-01T00:00:00Z')
+        assert KEY != dedup_key('other', 1, 'approved', '2022-01-01T00:00:00Z')
+
+    def test_membership(self):
+        index = DedupIndex()
+        assert KEY not in index
+        assert None not in index
+        index.add_many([KEY, None])
+        assert KEY in index
+        assert len(index) == 1
+
+    def test_persistent(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        DedupIndex(path).add_many([KEY])
+        assert KEY in DedupIndex(path), (
+            'Индекс должен сохраняться между перезапусками.'
+        )
+
+    def test_ttl(self):
+        clock = FakeClock()
+        index = DedupIndex(ttl=60, clock=clock)
+        index.add_many([KEY])
+        clock.now += 61
+        assert KEY not in index
+        index.prune()
+        assert len(index) == 0
+
+    def test_capacity(self):
+        clock = FakeClock()
+        index = DedupIndex(capacity=10, clock=clock)
+        keys = [dedup_key('token', number, 'approved', '')
+                for number in range(25)]
+        for key in keys:
+            clock.now += 1
+            index.add_many([key])
+        index.prune()
+        assert len(index) == 10
+        assert keys[-1] in index and keys[0] not in index, (
+            'Сверх capacity удаляются самые старые записи.'
+        )
+
+
+class TestOutboxKeys:
+
+    def test_envelope_collects_keys(self):
+        outbox = Outbox(chat_interval=0)
+        outbox.put(Notification(1, 'first', KEY))
+        outbox.put(Notification(1, 'error'))
+        envelope, = outbox.ready()
+        assert envelope.keys == [KEY]
+
+
+class FakeOutbox:
+
+    def __init__(self):
+        self.items = []
+
+    def put(self, notification):
+        self.items.append(notification)
+
+
+class FakeScheduler:
+
+    def observe(self, *args):
+        pass
+
+
+class TestPollerDedup:
+
+    def test_sent_notification_is_not_repeated(self, monkeypatch,
+                                               homework_module):
+        homework = {
+            'id': 1,
+            'homework_name': 'hw.zip',
+            'status': 'approved',
+            'date_updated': '2022-01-01T00:00:00Z',
+        }
+
+        async def answer(pipeline, token, timestamp, flights=None):
+            return {'homeworks': [homework], 'current_date': 1}, True
+
+        monkeypatch.setattr(homework_module, 'get_api_answer_async', answer)
+        index = DedupIndex()
+        index.add_many([homework_module.notification_key('token', homework)])
+        poller = homework_module.Poller(
+            None, None, FakeScheduler(), None, None, None, FakeOutbox(), index
+        )
+        asyncio.run(poller.poll(
+            homework_module.Subscription('token', 1),
+            homework_module.SubscriberState(0),
+        ))
+        assert poller.outbox.items == [], (
+            'Отправленное уведомление не должно ставиться в очередь повторно.'
+        )
+
+        index = DedupIndex()
+        poller.dedup = index
+        asyncio.run(poller.poll(
+            homework_module.Subscription('token', 1),
+            homework_module.SubscriberState(0),
+        ))
+        assert len(poller.outbox.items) == 1
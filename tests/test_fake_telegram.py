@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+import telegram
+
+import fake_telegram
+from models import Notification
+
+
+@pytest.fixture
+def fake_api():
+    api = fake_telegram.FakeTelegram(global_rate=2, chat_interval=1)
+    server = fake_telegram.make_server(api)
+    threading.Thread(
+        target=server.serve_forever, args=(0.05,), daemon=True
+    ).start()
+    bot = telegram.Bot(
+        token='1234:abcdefg', base_url=fake_telegram.base_url(server)
+    )
+    yield api, bot
+    server.shutdown()
+    server.server_close()
+
+
+class TestFakeTelegram:
+
+    def test_delivers_and_counts(self, fake_api, homework_module):
+        api, bot = fake_api
+        assert homework_module.send_message(bot, Notification(1, 'hi'))
+        assert api.delivered['1'] == ['hi'], (
+            'Заглушка должна запоминать доставленные сообщения по чатам.'
+        )
+
+    def test_chat_limit_raises_retry_after(self, fake_api, homework_module):
+        api, bot = fake_api
+        homework_module.send_message(bot, Notification(1, 'first'))
+        with pytest.raises(telegram.error.RetryAfter):
+            homework_module.send_message(bot, Notification(1, 'second'))
+        assert api.stats()['rejected'] == 1
+
+    def test_global_limit(self, fake_api, homework_module):
+        api, bot = fake_api
+        for chat_id in (1, 2):
+            homework_module.send_message(bot, Notification(chat_id, 'x'))
+        with pytest.raises(telegram.error.RetryAfter):
+            homework_module.send_message(bot, Notification(3, 'x'))
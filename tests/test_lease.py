@@ -0,0 +1,175 @@
+import asyncio
+
+from lease import Lease
+from models import Notification
+from outbox import Outbox
+from pipeline import AsyncPipeline
+from state import StateStore
+from utils import FakeClock
+
+
+def make_pair(tmp_path, clock, ttl=30):
+    path = str(tmp_path / 'lease.sqlite3')
+    return (
+        Lease(path, 'shard-0-of-1', owner='a', ttl=ttl, clock=clock),
+        Lease(path, 'shard-0-of-1', owner='b', ttl=ttl, clock=clock),
+    )
+
+
+class TestLease:
+
+    def test_single_holder(self, tmp_path):
+        first, second = make_pair(tmp_path, FakeClock())
+        assert first.acquire()
+        assert not second.acquire(), (
+            'Пока аренда действует, второй экземпляр не должен её получить.'
+        )
+        assert second.holder() == 'a'
+
+    def test_renewal_keeps_lease(self, tmp_path):
+        clock = FakeClock()
+        first, second = make_pair(tmp_path, clock)
+        for _ in range(5):
+            assert first.acquire()
+            clock.now += first.renew_interval
+            assert not second.acquire()
+
+    def test_failover_after_ttl(self, tmp_path):
+        clock = FakeClock()
+        first, second = make_pair(tmp_path, clock)
+        first.acquire()
+        clock.now += 29
+        assert not second.acquire()
+        clock.now += 1
+        assert second.acquire(), (
+            'Резервный экземпляр должен забрать аренду после истечения ttl.'
+        )
+        assert not first.acquire()
+        assert not first.held
+
+    def test_release(self, tmp_path):
+        first, second = make_pair(tmp_path, FakeClock())
+        first.acquire()
+        first.release()
+        assert first.holder() is None
+        assert second.acquire()
+
+    def test_other_layout_waits(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / 'lease.sqlite3')
+        old = [
+            Lease(path, f'shard-{index}-of-2', owner=f'old{index}', ttl=30,
+                  clock=clock, layout='workers-2')
+            for index in range(2)
+        ]
+        new = Lease(path, 'shard-0-of-4', owner='new', ttl=30, clock=clock,
+                    layout='workers-4')
+        assert old[0].acquire() and old[1].acquire(), (
+            'Шарды одной раскладки захватываются независимо.'
+        )
+        assert not new.acquire(), (
+            'Экземпляр с другим числом воркеров не должен опрашивать тех же '
+            'подписчиков, пока работают старые.'
+        )
+        assert new.holder() == 'layout workers-2'
+        clock.now += 20
+        old[1].acquire()
+        old[0].release()
+        clock.now += 20
+        assert not new.acquire(), 'Раскладку продлевает любой её шард.'
+        clock.now += 10
+        assert new.acquire()
+        assert not old[1].acquire()
+
+
+class FakePoller:
+
+    def __init__(self, leading=False):
+        self.leading = leading
+        self.calls = []
+
+    def take_over(self):
+        self.leading = True
+        self.calls.append('take_over')
+
+    def step_down(self):
+        self.leading = False
+        self.calls.append('step_down')
+
+
+class TestLead:
+
+    def test_lead_without_lease(self, homework_module):
+        poller = FakePoller()
+        assert homework_module.lead(None, poller)
+        assert homework_module.lead(None, poller)
+        assert poller.calls == ['take_over'], (
+            'Очередь шарда забирается один раз, при начале опроса.'
+        )
+
+    def test_leader_steps_down_on_lost_lease(self, homework_module,
+                                             tmp_path):
+        clock = FakeClock()
+        first, second = make_pair(tmp_path, clock)
+        poller = FakePoller()
+        assert homework_module.lead(first, poller)
+        clock.now += first.ttl + 1
+        assert second.acquire()
+        assert not homework_module.lead(first, poller)
+        assert not homework_module.lead(first, poller)
+        assert poller.calls == ['take_over', 'step_down'], (
+            'Потерявший аренду экземпляр должен отдать очередь и состояние.'
+        )
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class TestLeaseDuringCycle:
+
+    def make_poller(self, homework_module, lease):
+        return homework_module.Poller(
+            FakeBot(), None, None, None, AsyncPipeline(2), StateStore(),
+            Outbox(), lease=lease,
+        )
+
+    def test_lease_renewed_during_slow_cycle(self, homework_module,
+                                             tmp_path):
+        path = str(tmp_path / 'lease.sqlite3')
+        leader = Lease(path, 'shard-0-of-1', owner='a', ttl=1.2)
+        standby = Lease(path, 'shard-0-of-1', owner='b', ttl=1.2)
+        poller = self.make_poller(homework_module, leader)
+        assert leader.acquire()
+        taken = []
+
+        async def slow_poll():
+            await asyncio.sleep(1.5)
+            taken.append(standby.acquire())
+
+        poller.pipeline.run(poller.leased(slow_poll()))
+        poller.pipeline.close()
+        assert taken == [False], (
+            'Пока цикл дольше ttl идёт, аренда должна продлеваться.'
+        )
+        assert leader.valid()
+
+    def test_expired_lease_stops_sending(self, homework_module, tmp_path):
+        clock = FakeClock()
+        first, second = make_pair(tmp_path, clock)
+        poller = self.make_poller(homework_module, first)
+        assert homework_module.lead(first, poller)
+        poller.outbox.put(Notification(1, 'первое'))
+        clock.now += first.ttl + 1
+        assert not first.valid()
+        poller.flush()
+        assert poller.bot.sent == [], (
+            'С истёкшей арендой сообщения отправлять нельзя.'
+        )
+        assert len(poller.outbox) == 1
+        poller.pipeline.close()
@@ -0,0 +1,192 @@
+import os
+import signal
+import threading
+import time
+
+from dedup import dedup_key
+from lease import Lease
+from lifecycle import GracefulShutdown
+from models import Notification, SubscriberState
+from outbox import Outbox
+from pipeline import AsyncPipeline
+from state import StateStore
+
+
+KEY = dedup_key('token', 1, 'approved', '2022-01-01T00:00:00Z')
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class TestGracefulShutdown:
+
+    def test_signal_sets_flag_outside_sleep(self):
+        shutdown = GracefulShutdown()
+        assert shutdown.install()
+        try:
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert shutdown.requested, (
+                'SIGTERM должен только запросить остановку'
+            )
+            assert shutdown.signal_name == 'SIGTERM'
+        finally:
+            shutdown.restore()
+        assert signal.getsignal(signal.SIGTERM) is not shutdown.handle, (
+            'restore() должен вернуть прежний обработчик'
+        )
+
+    def test_signal_interrupts_sleep(self):
+        shutdown = GracefulShutdown()
+        shutdown.install()
+        timer = threading.Timer(
+            0.1, os.kill, (os.getpid(), signal.SIGTERM)
+        )
+        started = time.monotonic()
+        try:
+            timer.start()
+            with shutdown.sleeping():
+                if not shutdown.requested:
+                    time.sleep(10)
+        finally:
+            timer.cancel()
+            shutdown.restore()
+        assert time.monotonic() - started < 5, (
+            'Сигнал должен прерывать паузу между циклами'
+        )
+        assert shutdown.requested
+
+    def test_install_outside_main_thread(self):
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(GracefulShutdown().install())
+        )
+        thread.start()
+        thread.join()
+        assert results == [False]
+
+
+class TestPendingMessages:
+
+    def test_outbox_pending_and_restore(self):
+        outbox = Outbox()
+        outbox.put(Notification(1, 'первое', KEY))
+        envelopes = outbox.pending()
+        assert len(envelopes) == 1 and len(outbox) == 0
+        outbox.restore(1, 'первое', [KEY])
+        envelope = outbox.ready()[0]
+        assert envelope.texts == ['первое'] and envelope.keys == [KEY]
+
+    def test_store_roundtrip(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        outbox = Outbox()
+        outbox.put(Notification(1, 'первое', KEY))
+        outbox.put(Notification(2, 'второе'))
+        StateStore(path).save_pending(outbox.pending())
+        store = StateStore(path)
+        assert store.take_pending() == [
+            (1, 'первое', [KEY]), (2, 'второе', []),
+        ]
+        assert store.take_pending() == [], (
+            'Сохранённые сообщения забираются один раз'
+        )
+
+
+class TestPollerClose:
+
+    def make_poller(self, homework_module, path, bot, shard=''):
+        return homework_module.Poller(
+            bot, None, None, None, AsyncPipeline(2), StateStore(path),
+            Outbox(chat_interval=100, max_length=10), shard=shard,
+        )
+
+    def test_close_drains_and_keeps_the_rest(self, homework_module,
+                                             tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        bot = FakeBot()
+        poller = self.make_poller(homework_module, path, bot)
+        poller.states['token'] = SubscriberState(123, 'первое', {'1': 'ok'})
+        poller.outbox.put(Notification(1, 'первое'))
+        poller.outbox.put(Notification(1, 'второе'))
+        poller.close(timeout=1)
+        assert bot.sent == [(1, 'первое')], (
+            'При остановке очередь досылается в пределах лимитов'
+        )
+
+        restarted = self.make_poller(homework_module, path, FakeBot())
+        assert restarted.store.load('token').timestamp == 123, (
+            'Курсор подписчика должен сохраняться при остановке'
+        )
+        homework_module.lead(None, restarted)
+        restarted.flush()
+        assert restarted.bot.sent == [(1, 'второе')], (
+            'Неотправленное сообщение должно уйти после перезапуска'
+        )
+        restarted.close(timeout=0)
+
+    def test_lease_handoff_moves_pending_messages(self, homework_module,
+                                                  tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        other = Outbox()
+        other.put(Notification(9, 'чужой шард'))
+        StateStore(path).save_pending(other.pending(), 'shard-1-of-2')
+        clock = lambda: 1000.0  # noqa: E731
+        leases = [
+            Lease(path, 'shard-0-of-2', owner=owner, clock=clock)
+            for owner in ('a', 'b')
+        ]
+        leader, standby = (
+            self.make_poller(
+                homework_module, path, FakeBot(), 'shard-0-of-2'
+            )
+            for _ in range(2)
+        )
+        assert homework_module.lead(leases[0], leader)
+        assert not homework_module.lead(leases[1], standby)
+        leader.outbox.put(Notification(1, 'первое'))
+        leader.outbox.put(Notification(1, 'второе'))
+        leader.close(timeout=0)
+        leases[0].release()
+        assert len(standby.outbox) == 0, (
+            'Резерв не должен забирать очередь, пока не держит аренду'
+        )
+
+        assert homework_module.lead(leases[1], standby)
+        standby.flush()
+        assert leader.bot.sent == [(1, 'первое')]
+        assert standby.bot.sent == [(1, 'второе')], (
+            'Новый держатель аренды должен досылать очередь прежнего'
+        )
+        assert StateStore(path).take_pending('shard-1-of-2') == [
+            (9, 'чужой шард', []),
+        ], 'Очередь другого шарда не должна забираться'
+        standby.close(timeout=0)
+
+    def test_lost_lease_hands_queue_over(self, homework_module, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        poller = self.make_poller(homework_module, path, FakeBot())
+        homework_module.lead(None, poller)
+        poller.outbox.put(Notification(1, 'первое'))
+        poller.step_down()
+        assert len(poller.outbox) == 0 and not poller.leading
+        assert poller.store.take_pending() == [(1, 'первое', [])]
+        poller.close(timeout=0)
+
+    def test_close_without_lease_does_not_wait(self, homework_module,
+                                               tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        poller = self.make_poller(homework_module, path, FakeBot())
+        poller.lease = Lease(path, 'shard-0-of-1', owner='a', ttl=30)
+        poller.outbox.put(Notification(1, 'первое'))
+        started = time.monotonic()
+        poller.close(timeout=5)
+        assert time.monotonic() - started < 1, (
+            'Без аренды остановка не должна ждать SHUTDOWN_TIMEOUT'
+        )
+        assert poller.bot.sent == []
+        assert StateStore(path).take_pending() == [(1, 'первое', [])]
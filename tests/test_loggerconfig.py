@@ -0,0 +1,112 @@
+import io
+import json
+import logging
+import sys
+
+import pytest
+
+import loggerconfig
+
+
+def make_record(message='сообщение', exc_info=None):
+    return logging.LogRecord(
+        'homework', logging.INFO, __file__, 10, message, (), exc_info,
+        func='poll',
+    )
+
+
+class TestParseLevels:
+
+    def test_parses_pairs(self):
+        assert loggerconfig.parse_levels('homework=info, outbox=Debug') == {
+            'homework': 'INFO', 'outbox': 'DEBUG',
+        }
+
+    @pytest.mark.parametrize('value', [None, '', ','])
+    def test_empty(self, value):
+        assert loggerconfig.parse_levels(value) == {}
+
+    def test_env_levels_override_defaults(self):
+        assert loggerconfig.LOG_LEVELS['homework'] == 'DEBUG'
+        config = loggerconfig.LOGGING_CONFIG['loggers']
+        assert config['homework']['level'] == 'DEBUG'
+
+
+class TestJsonFormatter:
+
+    def test_one_line_json(self):
+        line = loggerconfig.JsonFormatter().format(make_record('привет'))
+        data = json.loads(line)
+        assert '\n' not in line
+        assert data['message'] == 'привет' and data['level'] == 'INFO'
+        assert data['logger'] == 'homework'
+        assert (data['func'], data['line']) == ('poll', 10)
+
+    def test_without_caller(self):
+        data = json.loads(
+            loggerconfig.JsonFormatter(caller=False).format(make_record())
+        )
+        assert 'func' not in data and 'line' not in data
+
+    def test_exception(self):
+        try:
+            raise ValueError('ошибка')
+        except ValueError:
+            record = make_record(exc_info=sys.exc_info())
+        data = json.loads(loggerconfig.JsonFormatter().format(record))
+        assert 'ValueError: ошибка' in data['exc']
+
+
+class TestQueueHandler:
+
+    def test_listener_writes_in_background(self):
+        stream = io.StringIO()
+        handler = loggerconfig.queue_handler(json_output=True, stream=stream)
+        logger = logging.getLogger('test_loggerconfig.queue')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            logger.warning('в очередь')
+        finally:
+            logger.removeHandler(handler)
+            handler.listener.stop()
+            loggerconfig._listeners.remove(handler.listener)
+        assert json.loads(stream.getvalue())['message'] == 'в очередь', (
+            'Записи из очереди должны дописываться при остановке слушателя.'
+        )
+
+
+class TestLoggerNames:
+
+    def test_homework_logger_is_named_explicitly(self, homework_module):
+        assert homework_module.logger.name == 'homework', (
+            'В воркерах spawn модуль называется __mp_main__, '
+            'уровни настраиваются для логгера homework.'
+        )
+        assert homework_module.logger.getEffectiveLevel() == logging.DEBUG
+
+    def test_callerless_logger(self):
+        logger = loggerconfig.CallerlessLogger('test')
+        assert logger.findCaller()[2] == '(unknown function)'
+
+    def test_callerless_applies_to_existing_loggers(self):
+        existing = logging.getLogger('test_loggerconfig.existing')
+        try:
+            loggerconfig.use_callerless_loggers()
+            created = logging.getLogger('test_loggerconfig.created')
+            assert type(existing) is loggerconfig.CallerlessLogger, (
+                'LOG_CALLER=0 должен действовать и на логгеры модулей, '
+                'импортированных раньше loggerconfig.'
+            )
+            assert type(created) is loggerconfig.CallerlessLogger
+        finally:
+            logging.setLoggerClass(logging.Logger)
+            for logger in logging.Logger.manager.loggerDict.values():
+                if type(logger) is loggerconfig.CallerlessLogger:
+                    logger.__class__ = logging.Logger
+
+    @pytest.mark.parametrize('name', ['commands', 'cursor', 'sharding'])
+    def test_module_loggers_have_levels(self, homework_module, name):
+        assert logging.getLogger(name).isEnabledFor(logging.INFO), (
+            'INFO-записи модулей не должны отсекаться уровнем root.'
+        )
@@ -0,0 +1,139 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+import metrics
+from models import Notification
+from outbox import Outbox
+
+
+@pytest.fixture
+def registry():
+    return metrics.Registry()
+
+
+class TestTextFormat:
+
+    def test_counter_with_labels(self, registry):
+        counter = registry.register(
+            metrics.Counter('calls_total', 'Вызовы.', ('function',))
+        )
+        counter.inc(2, 'poll')
+        counter.inc(1, 'poll')
+        assert registry.render() == (
+            '# HELP calls_total Вызовы.\n'
+            '# TYPE calls_total counter\n'
+            'calls_total{function="poll"} 3\n'
+        )
+
+    def test_gauge_and_callback_counter(self, registry):
+        registry.register(metrics.Gauge('queued', 'Очередь.', lambda: 5))
+        registry.register(metrics.CallbackCounter(
+            'messages_total', 'Сообщения.', lambda: {'sent': 7},
+            label='result',
+        ))
+        lines = registry.render().splitlines()
+        assert '# TYPE queued gauge' in lines
+        assert 'queued 5' in lines
+        assert '# TYPE messages_total counter' in lines, (
+            'Накопительные значения должны отдаваться как counter.'
+        )
+        assert 'messages_total{result="sent"} 7' in lines
+
+    def test_metric_replaced_by_name(self, registry):
+        registry.register(metrics.Gauge('value', 'Старое.', lambda: 1))
+        registry.register(metrics.Gauge('value', 'Новое.', lambda: 2))
+        assert registry.render().count('# HELP value') == 1
+        assert 'value 2' in registry.render()
+
+
+class TestHistogram:
+
+    def test_cumulative_buckets(self):
+        histogram = metrics.Histogram('latency', 'Время.', buckets=(1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        assert histogram.samples() == [
+            'latency_bucket{le="1"} 2',
+            'latency_bucket{le="5"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            'latency_sum 14.5',
+            'latency_count 4',
+        ]
+
+    def test_labels_are_kept_per_series(self):
+        histogram = metrics.Histogram(
+            'latency', 'Время.', ('function',), buckets=(1,)
+        )
+        histogram.observe(0.5, 'poll')
+        histogram.observe(2, 'send')
+        samples = histogram.samples()
+        assert 'latency_bucket{function="poll",le="1"} 1' in samples
+        assert 'latency_bucket{function="send",le="1"} 0' in samples
+        assert 'latency_count{function="send"} 1' in samples
+
+
+def series(histogram, name):
+    with histogram._lock:
+        values = histogram._values.get((name,))
+    return (0, 0.0, 0) if values is None else tuple(values)
+
+
+class TestInstrument:
+
+    def test_records_time_and_errors(self):
+        @metrics.instrument('test_instrument')
+        def step(fail=False):
+            if fail:
+                raise ValueError('ошибка')
+            return 'ok'
+
+        assert step() == 'ok'
+        with pytest.raises(ValueError):
+            step(fail=True)
+        assert series(metrics.CALL_SECONDS, 'test_instrument')[2] == 2, (
+            'Время должно учитываться и для успешных, и для упавших вызовов.'
+        )
+        with metrics.CALL_ERRORS._lock:
+            errors = metrics.CALL_ERRORS._values[('test_instrument',)]
+        assert errors == 1
+        assert step.__name__ == 'step'
+
+
+class TestServer:
+
+    def test_serves_metrics_on_localhost(self):
+        server = metrics.start_server(0)
+        host, port = server.server_address
+        try:
+            assert host == '127.0.0.1', (
+                'По умолчанию сервер метрик не должен слушать все интерфейсы.'
+            )
+            with urllib.request.urlopen(
+                f'http://{host}:{port}/metrics', timeout=5
+            ) as response:
+                assert response.headers['Content-Type'] == (
+                    metrics.CONTENT_TYPE
+                )
+                assert b'homework_bot_call_seconds' in response.read()
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f'http://{host}:{port}/', timeout=5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestOutboxSnapshot:
+
+    def test_len_is_tracked(self):
+        outbox = Outbox(chat_interval=0, max_length=10)
+        for chat_id in (1, 1, 2):
+            outbox.put(Notification(chat_id, 'сообщение'))
+        assert len(outbox) == 3
+        batch = outbox.ready()
+        assert len(outbox) == 3 - len(batch)
+        outbox.done(batch[0], 'ошибка')
+        assert len(outbox) == 4 - len(batch)
+        outbox.pending()
+        assert len(outbox) == 0 and outbox.stats()['queued'] == 0
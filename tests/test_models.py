@@ -0,0 +1,152 @@
+import json
+import sys
+
+import pytest
+
+from cache import ResponseCache
+from models import Homework
+
+
+API_HOMEWORK = {
+    'id': 1,
+    'homework_name': 'hw.zip',
+    'lesson_name': 'Спринт 1',
+    'reviewer_comment': 'Замечания',
+    'status': 'approved',
+    'date_updated': '2022-01-01T00:00:00Z',
+}
+
+
+class TestHomework:
+
+    def test_keeps_used_fields_only(self):
+        homework = Homework.from_api(API_HOMEWORK)
+        assert homework.get('homework_name') == 'hw.zip'
+        assert homework.get('reviewer_comment') is None
+        assert not hasattr(homework, '__dict__'), (
+            'Homework должен хранить поля в __slots__.'
+        )
+
+    def test_missing_fields_behave_like_dict(self):
+        homework = Homework.from_api({'homework_name': 'hw.zip'})
+        assert homework.get('id', 'fallback') == 'fallback'
+        assert homework.get('status') is None
+
+    def test_status_is_interned(self):
+        status = ''.join(['appr', 'oved'])
+        homework = Homework.from_api(dict(API_HOMEWORK, status=status))
+        assert homework.status is sys.intern('approved')
+
+    @pytest.mark.parametrize('data', [None, 1, 'hw', ['hw']])
+    def test_not_dict_is_passed_through(self, data):
+        assert Homework.from_api(data) is data
+
+    def test_check_response_builds_records(self, homework_module):
+        homeworks = homework_module.check_response(
+            {'homeworks': [API_HOMEWORK], 'current_date': 1}
+        )
+        assert homeworks == [Homework.from_api(API_HOMEWORK)]
+        assert homework_module.parse_status(homeworks[0]) == (
+            homework_module.parse_status(API_HOMEWORK)
+        ), 'parse_status должна принимать и словарь, и Homework.'
+
+    def test_records_are_hashable(self):
+        first = Homework.from_api(API_HOMEWORK)
+        second = Homework.from_api(dict(API_HOMEWORK))
+        assert first == second and hash(first) == hash(second)
+        assert len({first, second}) == 1
+
+    def test_response_cache_keeps_records(self, homework_module,
+                                          monkeypatch):
+        monkeypatch.setattr(
+            homework_module, 'response_cache', ResponseCache(10)
+        )
+
+        class Response:
+            status_code = 200
+            content = json.dumps(
+                {'homeworks': [API_HOMEWORK], 'current_date': 1}
+            ).encode()
+            headers = {}
+
+        monkeypatch.setattr(
+            homework_module.transport, 'get', lambda *a, **k: Response()
+        )
+        answer, _ = homework_module.fetch_statuses('token', 0)
+        cached = homework_module.response_cache.lookup('token').payload
+        assert cached is answer
+        assert all(
+            isinstance(homework, Homework) for homework in cached['homeworks']
+        ), 'Кеш ответов должен хранить записи Homework, а не словари.'
+        homeworks = homework_module.check_response(answer)
+        assert homeworks[0] is cached['homeworks'][0], (
+            'check_response не должна пересоздавать готовые записи.'
+        )
+
+
+def records(*homeworks):
+    return [Homework.from_api(homework) for homework in homeworks]
+
+
+class TestParseStatuses:
+
+    def test_oldest_first_and_remembered(self, homework_module):
+        newer = dict(API_HOMEWORK, id=2, homework_name='new.zip')
+        statuses = {}
+        messages, errors = homework_module.parse_statuses(
+            records(newer, API_HOMEWORK), statuses
+        )
+        assert errors == []
+        ids = [update.homework.get('id') for update in messages]
+        assert ids == [1, 2], (
+            'API отдаёт домашки от новых к старым, '
+            'уведомлять нужно по порядку.'
+        )
+        assert 'hw.zip' in messages[0].message
+        assert statuses == {'1': 'approved', '2': 'approved'}
+
+    def test_known_status_is_skipped(self, homework_module):
+        statuses = {'1': 'approved'}
+        messages, errors = homework_module.parse_statuses(
+            records(API_HOMEWORK), statuses
+        )
+        assert messages == [] and errors == []
+        messages, _ = homework_module.parse_statuses(
+            records(dict(API_HOMEWORK, status='rejected')), statuses
+        )
+        assert len(messages) == 1 and statuses == {'1': 'rejected'}
+
+    def test_unknown_status(self, homework_module):
+        statuses = {}
+        messages, errors = homework_module.parse_statuses(
+            records(API_HOMEWORK, dict(API_HOMEWORK, id=2, status='lost')),
+            statuses,
+        )
+        assert len(messages) == 1
+        assert [type(error) for error in errors] == [
+            homework_module.ex.UnknownStatusException
+        ]
+        assert statuses == {'1': 'approved'}, (
+            'Домашка с ошибкой не должна считаться отправленной.'
+        )
+
+    def test_missing_keys(self, homework_module):
+        statuses = {}
+        nameless = dict(API_HOMEWORK)
+        del nameless['homework_name']
+        messages, errors = homework_module.parse_statuses(
+            records(nameless, {'homework_name': 'hw.zip'}), statuses
+        )
+        assert messages == []
+        assert [type(error) for error in errors] == [
+            homework_module.ex.UnknownStatusException,
+            homework_module.ex.HaveNotHomeworkName,
+        ]
+        assert statuses == {}
+
+    def test_key_falls_back_to_name(self, homework_module):
+        homework = dict(API_HOMEWORK)
+        del homework['id']
+        statuses = {}
+        homework_module.parse_statuses(records(homework), statuses)
+        assert statuses == {'hw.zip': 'approved'}
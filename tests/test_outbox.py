@@ -0,0 +1,71 @@
+from models import Notification
+from outbox import Outbox, split_text
+from utils import FakeClock
+
+
+class TestOutbox:
+
+    def test_coalesces_updates_for_one_chat(self):
+        outbox = Outbox(clock=FakeClock())
+        outbox.put(Notification(1, 'first'))
+        outbox.put(Notification(1, 'second'))
+        batch = outbox.ready()
+        assert len(batch) == 1, (
+            'Обновления для одного чата должны склеиваться в одно сообщение.'
+        )
+        assert str(batch[0].notification()) == 'first\n\nsecond'
+
+    def test_respects_chat_and_global_limits(self):
+        clock = FakeClock()
+        outbox = Outbox(global_rate=2, chat_interval=1, max_length=5,
+                        clock=clock)
+        outbox.put(Notification(1, 'aaaa'))
+        outbox.put(Notification(1, 'bbbb'))
+        outbox.put(Notification(2, 'cccc'))
+        outbox.put(Notification(3, 'dddd'))
+        assert [e.chat_id for e in outbox.ready()] == [1, 2], (
+            'За раз можно отправить не больше global_rate сообщений '
+            'и одно сообщение в чат.'
+        )
+        assert outbox.next_delay() == 1
+        clock.now = 1
+        assert sorted(e.chat_id for e in outbox.ready()) == [1, 3]
+
+    def test_retry_after_and_drop(self):
+        clock = FakeClock()
+        outbox = Outbox(max_attempts=2, clock=clock)
+        outbox.put(Notification(1, 'text'))
+        envelope, = outbox.ready()
+        outbox.done(envelope, 'flood', retry_after=10)
+        assert outbox.ready() == []
+        assert outbox.next_delay() == 10
+        clock.now = 10
+        envelope, = outbox.ready()
+        outbox.done(envelope, 'fail')
+        assert outbox.stats()['dropped'] == 1, (
+            'После max_attempts неудачных попыток сообщение отбрасывается.'
+        )
+        assert outbox.next_delay() is None
+
+    def test_long_message_is_split(self):
+        outbox = Outbox(chat_interval=0, max_length=10, clock=FakeClock())
+        outbox.put(Notification(1, 'строка 1\nстрока 2\n' + 'x' * 25, b'key'))
+        texts = []
+        while len(outbox):
+            for envelope in outbox.ready():
+                texts.append(str(envelope.notification()))
+                keys = envelope.keys
+        assert all(len(text) <= 10 for text in texts), (
+            'Telegram не принимает сообщения длиннее лимита.'
+        )
+        assert texts == [
+            'строка 1', 'строка 2', 'x' * 10, 'x' * 10, 'x' * 5,
+        ], 'Текст режется по строкам, а длинная строка - по лимиту.'
+        assert keys == [b'key'], (
+            'Ключ дедупликации помечается после отправки последней части.'
+        )
+
+    def test_split_text(self):
+        assert split_text('short', 10) == ['short']
+        assert split_text('', 10) == ['']
+        assert split_text('abc\n\n\ndef', 3) == ['abc', 'def']
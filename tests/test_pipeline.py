@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from pipeline import AsyncPipeline
+
+
+class TestAsyncPipeline:
+
+    def test_concurrency_is_limited(self):
+        pipeline = AsyncPipeline(3)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+        async def batch():
+            await asyncio.gather(*(pipeline.call(work) for _ in range(12)))
+
+        pipeline.run(batch())
+        pipeline.close()
+        assert peak[0] == 3, (
+            'Одновременно должно выполняться не больше concurrency вызовов.'
+        )
+
+    def test_calls_overlap(self):
+        pipeline = AsyncPipeline(10)
+
+        async def batch():
+            await asyncio.gather(
+                *(pipeline.call(time.sleep, 0.1) for _ in range(10))
+            )
+
+        started = time.monotonic()
+        pipeline.run(batch())
+        pipeline.close()
+        assert time.monotonic() - started < 0.5, (
+            'Блокирующие вызовы должны выполняться внахлёст.'
+        )
+
+    def test_arguments_and_result(self):
+        pipeline = AsyncPipeline(1)
+        result = pipeline.run(
+            pipeline.call(lambda a, b=0: a + b, 1, b=2)
+        )
+        pipeline.close()
+        assert result == 3
+
+    def test_exception_propagates(self):
+        pipeline = AsyncPipeline(2)
+
+        def fail():
+            raise ValueError('ошибка')
+
+        with pytest.raises(ValueError, match='ошибка'):
+            pipeline.run(pipeline.call(fail))
+
+        async def batch():
+            return await asyncio.gather(
+                pipeline.call(fail), pipeline.call(lambda: 'ok'),
+                return_exceptions=True,
+            )
+
+        first, second = pipeline.run(batch())
+        pipeline.close()
+        assert isinstance(first, ValueError) and second == 'ok', (
+            'Ошибка одного вызова не должна мешать остальным.'
+        )
+
+    def test_close_waits_and_stops_loop(self):
+        pipeline = AsyncPipeline(2)
+        done = []
+
+        async def start():
+            pipeline._loop.run_in_executor(
+                None, lambda: (time.sleep(0.05), done.append(1))
+            )
+
+        pipeline.run(start())
+        pipeline.close()
+        assert done == [1], 'close() должен дождаться запущенных вызовов.'
+        coroutine = pipeline.call(lambda: None)
+        with pytest.raises(RuntimeError):
+            pipeline.run(coroutine)
+        coroutine.close()
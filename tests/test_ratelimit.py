@@ -0,0 +1,55 @@
+from ratelimit import HostRateLimiter, TokenBucket
+from scheduler import PollScheduler
+from utils import FakeClock
+
+
+class TestTokenBucket:
+
+    def test_burst_then_wait(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5, (
+            'После исчерпания ведра ожидание должно равняться 1 / rate.'
+        )
+        assert bucket.reserve() == 1.0, (
+            'Ожидающие должны получать места по очереди.'
+        )
+
+    def test_pause_blocks_acquire(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock)
+        bucket.pause(5)
+        assert not bucket.try_acquire()
+        clock.now = 5
+        assert bucket.try_acquire()
+
+    def test_host_limit_applies_only_to_its_host(self):
+        waits = []
+        limiter = HostRateLimiter(
+            100, {'practicum.yandex.ru': 0.5}, sleep=waits.append
+        )
+        limiter.acquire('https://practicum.yandex.ru/api/')
+        limiter.acquire('https://example.com/')
+        limiter.acquire('https://practicum.yandex.ru/api/')
+        assert len(waits) == 1 and waits[0] > 1
+
+
+class TestJitter:
+
+    def test_spread_is_even_and_deterministic(self):
+        clock = FakeClock()
+        scheduler = PollScheduler(600, clock=clock)
+        tokens = [f'token{i}' for i in range(4)]
+        scheduler.add_spread(tokens)
+        offsets = sorted(due for due, _, _ in scheduler._queue)
+        assert offsets == [0, 150, 300, 450], (
+            'Опросы должны равномерно распределяться по периоду.'
+        )
+        other = PollScheduler(600, clock=clock)
+        other.add_spread(reversed(tokens))
+        assert (
+            [token for _, _, token in sorted(scheduler._queue)]
+            == [token for _, _, token in sorted(other._queue)]
+        ), 'Порядок опросов должен зависеть только от токенов.'
@@ -0,0 +1,60 @@
+import pytest
+
+from scheduler import PollScheduler
+from utils import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestPollScheduler:
+
+    def test_polls_due_tokens_and_reschedules(self, clock):
+        scheduler = PollScheduler(600, clock=clock)
+        scheduler.add('a')
+        scheduler.add('b', 100)
+        polled = []
+
+        delay = scheduler.run_pending(polled.extend)
+        assert polled == ['a'], (
+            'Планировщик должен опрашивать только подписчиков, '
+            'чьё время подошло.'
+        )
+        assert delay == 100
+
+        clock.now = 100
+        delay = scheduler.run_pending(polled.extend)
+        assert polled == ['a', 'b']
+        assert delay == 500
+
+    def test_dropped_tokens_leave_schedule(self, clock):
+        scheduler = PollScheduler(600, clock=clock)
+        scheduler.add('a')
+        scheduler.run_pending(lambda tokens: tokens)
+        assert 'a' not in scheduler, (
+            'Токены, которые вернул poll_many, должны сниматься с расписания.'
+        )
+
+    def test_reviewing_tightens_interval(self, clock):
+        scheduler = PollScheduler(600, min_period=120, clock=clock)
+        scheduler.observe('a', active=False, reviewing=True)
+        assert scheduler.interval('a') == 120
+
+    def test_idle_backs_off_within_bounds(self, clock):
+        scheduler = PollScheduler(
+            600, max_period=2000, factor=2, idle_polls=3, clock=clock
+        )
+        for _ in range(2):
+            scheduler.observe('a', active=False, reviewing=False)
+        assert scheduler.interval('a') == 600, (
+            'Интервал не должен расти раньше idle_polls холостых опросов.'
+        )
+        for _ in range(3):
+            scheduler.observe('a', active=False, reviewing=False)
+        assert scheduler.interval('a') == 2000, (
+            'Интервал не должен превышать max_period.'
+        )
+        scheduler.observe('a', active=True, reviewing=False)
+        assert scheduler.interval('a') == 600
@@ -0,0 +1,145 @@
+from models import Subscription
+from sharding import HashRing, Supervisor, worker_name
+from subscriptions import SubscriptionRegistry
+from utils import FakeClock
+
+
+TOKENS = [f'token{index}' for index in range(2000)]
+
+
+class FakeProcess:
+
+    def __init__(self, target, args, name):
+        self.name = name
+        self.alive = False
+        self.exitcode = None
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+
+    def join(self):
+        pass
+
+
+class FakeContext:
+    Process = FakeProcess
+
+
+class TestHashRing:
+
+    def test_owner_is_stable(self):
+        ring = HashRing(['a', 'b', 'c'])
+        other = HashRing(['c', 'a', 'b'])
+        assert all(ring.owner(token) == other.owner(token)
+                   for token in TOKENS), (
+            'Владелец токена не должен зависеть от порядка узлов.'
+        )
+
+    def test_balanced(self):
+        ring = HashRing([worker_name(index) for index in range(4)])
+        counts = {}
+        for token in TOKENS:
+            owner = ring.owner(token)
+            counts[owner] = counts.get(owner, 0) + 1
+        assert len(counts) == 4
+        assert min(counts.values()) > len(TOKENS) / 4 * 0.6, (
+            'Подписчики должны распределяться по воркерам равномерно.'
+        )
+
+    def test_add_node_moves_few_tokens(self):
+        ring = HashRing([worker_name(index) for index in range(4)])
+        before = {token: ring.owner(token) for token in TOKENS}
+        ring.add(worker_name(4))
+        moved = [
+            token for token in TOKENS if ring.owner(token) != before[token]
+        ]
+        assert all(ring.owner(token) == worker_name(4) for token in moved), (
+            'При добавлении воркера подписчики переезжают только на него.'
+        )
+        assert len(moved) < len(TOKENS) * 0.35
+
+    def test_remove_node(self):
+        ring = HashRing(['a', 'b'])
+        ring.remove('a')
+        assert 'a' not in ring
+        assert {ring.owner(token) for token in TOKENS} == {'b'}
+        ring.remove('b')
+        assert ring.owner('token') is None
+
+
+class TestSharding:
+
+    def test_shards_are_disjoint(self, homework_module):
+        registry = SubscriptionRegistry(subscriptions=[
+            Subscription(token, index) for index, token in enumerate(TOKENS)
+        ])
+        shards = [
+            {subscription.token for subscription in
+             homework_module.shard_subscriptions(registry, index, 3)}
+            for index in range(3)
+        ]
+        assert sum(len(shard) for shard in shards) == len(TOKENS)
+        assert set.union(*shards) == set(TOKENS), (
+            'Каждый подписчик должен принадлежать ровно одному воркеру.'
+        )
+
+    def test_select_is_detached_from_file(self, tmp_path):
+        path = tmp_path / 'subscriptions.json'
+        path.write_text('{"a": 1, "b": 2}')
+        registry = SubscriptionRegistry.load(str(path))
+        shard = registry.select(lambda token: token == 'a')
+        assert len(shard) == 1 and shard.path is None
+
+
+class TestSupervisor:
+
+    def test_restarts_dead_workers(self):
+        supervisor = Supervisor(3, print, context=FakeContext)
+        supervisor.start()
+        assert supervisor.check() == []
+        supervisor.processes[1].alive = False
+        assert supervisor.check() == [1], (
+            'Супервизор должен перезапускать завершившиеся воркеры.'
+        )
+        assert supervisor.processes[1].is_alive()
+        supervisor.stop()
+        assert supervisor.processes == {}
+
+    def test_crash_loop_backs_off(self):
+        clock = FakeClock()
+        supervisor = Supervisor(
+            1, print, context=FakeContext, base_delay=1, max_delay=4,
+            stable_after=60, clock=clock,
+        )
+        supervisor.start()
+        restarts = []
+        for _ in range(6):
+            supervisor.processes[0].alive = False
+            while not supervisor.check():
+                clock.now += 1
+            restarts.append(clock.now)
+        assert restarts == [0, 1, 3, 7, 11, 15], (
+            'Пауза перед перезапуском должна расти вдвое до max_delay.'
+        )
+
+    def test_backoff_resets_after_stable_run(self):
+        clock = FakeClock()
+        supervisor = Supervisor(
+            1, print, context=FakeContext, stable_after=60, clock=clock,
+        )
+        supervisor.start()
+        for _ in range(3):
+            supervisor.processes[0].alive = False
+            while not supervisor.check():
+                clock.now += 1
+        clock.now += 60
+        supervisor.processes[0].alive = False
+        assert supervisor.check() == [0], (
+            'Воркер, проработавший stable_after, перезапускается сразу.'
+        )
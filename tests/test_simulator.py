@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+import simulator
+
+
+@pytest.fixture
+def api(monkeypatch, homework_module):
+    def start(**kwargs):
+        server = simulator.make_server(simulator.Simulator(seed=1, **kwargs))
+        threading.Thread(
+            target=server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        monkeypatch.setattr(
+            homework_module, 'ENDPOINT', simulator.endpoint(server)
+        )
+        servers.append(server)
+        return server
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class TestSimulator:
+
+    def test_payload_passes_bot_checks(self, api, homework_module):
+        api(homeworks=2)
+        response = homework_module.get_api_answer(0)
+        homeworks = homework_module.check_response(response)
+        assert len(homeworks) == 2, (
+            'Симулятор должен отдавать домашки в формате API Практикума.'
+        )
+        for homework in homeworks:
+            homework_module.parse_status(homework)
+        assert isinstance(response['current_date'], int)
+
+    def test_from_date_filters_old_homeworks(self, api, homework_module):
+        api(homeworks=2, change_rate=0)
+        response = homework_module.get_api_answer(0)
+        later = homework_module.get_api_answer(response['current_date'] + 1)
+        assert later['homeworks'] == []
+
+    def test_error_injection(self, api, homework_module):
+        api(error_rate=1)
+        with pytest.raises(homework_module.ex.WrongAnswerStatus):
+            homework_module.get_api_answer(0)
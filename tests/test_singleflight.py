@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from commands import CommandHandler
+from models import Homework, Subscription
+from singleflight import SingleFlight
+from subscriptions import SubscriptionRegistry
+from utils import FakeClock
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_request(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'answer'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(flights.do('token', fetch))
+            )
+            for _ in range(10)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while flights.stats()['shared'] < 9:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Одновременные вызовы с одним ключом должны делать один запрос.'
+        )
+        assert results == ['answer'] * 10
+
+    def test_freshness_window(self):
+        clock = FakeClock()
+        flights = SingleFlight(freshness=30, clock=clock)
+        calls = []
+
+        def fetch(value):
+            calls.append(value)
+            return value
+
+        assert flights.do('token', fetch, 1) == 1
+        clock.now = 29
+        assert flights.do('token', fetch, 2) == 1
+        assert flights.do('other', fetch, 3) == 3
+        clock.now = 30
+        assert flights.do('token', fetch, 4) == 4
+        assert calls == [1, 3, 4]
+        assert flights.stats() == {'calls': 3, 'shared': 0, 'fresh': 1}
+
+    def test_errors_are_not_cached(self):
+        flights = SingleFlight(freshness=30, clock=FakeClock())
+
+        def fail():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            flights.do('token', fail)
+        assert flights.do('token', lambda: 'ok') == 'ok'
+
+    def test_forget(self):
+        flights = SingleFlight(freshness=30, clock=FakeClock())
+        flights.do('token', lambda: 1)
+        flights.forget('token')
+        assert flights.do('token', lambda: 2) == 2
+
+
+class TestRefreshCommand:
+
+    def make_handler(self, refresh):
+        registry = SubscriptionRegistry(
+            subscriptions=[Subscription('token1234', 1)]
+        )
+        return CommandHandler(registry, {}.get, refresh)
+
+    def test_refresh_lists_fresh_statuses(self):
+        handler = self.make_handler(lambda token: [
+            Homework(homework_name='hw.zip', status='approved')
+        ])
+        assert '/refresh' in handler.dispatch(1, '/help')
+        assert handler.dispatch(1, '/refresh') == '"hw.zip": принято'
+
+    def test_refresh_without_changes(self):
+        reply = self.make_handler(lambda token: []).dispatch(1, '/refresh')
+        assert reply.startswith('новых изменений нет')
+
+    def test_refresh_api_error(self):
+        def refresh(token):
+            raise ConnectionError('timeout')
+
+        reply = self.make_handler(refresh).dispatch(1, '/refresh')
+        assert 'не отвечает' in reply
+
+    def test_refresh_disabled(self):
+        handler = CommandHandler(SubscriptionRegistry(), {}.get)
+        assert '/refresh' not in handler.dispatch(1, '/help')
+
+
+class TestPollerRefresh:
+
+    def test_refresh_keeps_change_for_poller(self, monkeypatch,
+                                             homework_module):
+        answer = {'homeworks': [], 'current_date': 1}
+        forgotten = []
+
+        def fetch_statuses(token, timestamp):
+            return answer, True
+
+        monkeypatch.setattr(homework_module, 'fetch_statuses', fetch_statuses)
+        monkeypatch.setattr(
+            homework_module.response_cache, 'forget', forgotten.append
+        )
+        poller = homework_module.Poller(
+            None, None, None, None, None, None, None, freshness=30
+        )
+        poller.store = homework_module.StateStore()
+        assert poller.refresh('token') == []
+        assert forgotten == ['token'], (
+            'Изменение, увиденное /refresh, должен обработать плановый опрос.'
+        )
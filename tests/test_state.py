@@ -0,0 +1,120 @@
+import sys
+import threading
+
+import pytest
+
+from models import Notification, SubscriberState
+from outbox import Outbox
+from state import StateStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'state.sqlite3')
+
+
+def state(timestamp, statuses=None):
+    return SubscriberState(timestamp, f'сообщение {timestamp}', statuses or {})
+
+
+class TestStateStore:
+
+    def test_roundtrip(self):
+        store = StateStore()
+        assert store.load('token') is None
+        store.save_many([
+            ('first', state(1, {'1': 'approved'})),
+            ('second', state(2)),
+        ])
+        first = store.load('first')
+        assert (first.timestamp, first.last_message, first.statuses) == (
+            1, 'сообщение 1', {'1': 'approved'}
+        )
+        assert store.load('second').statuses == {}
+        assert first.statuses['1'] is sys.intern('approved'), (
+            'Статусы из базы должны интернироваться.'
+        )
+
+    def test_save_overwrites(self):
+        store = StateStore()
+        store.save('token', state(1, {'1': 'reviewing'}))
+        store.save('token', state(5, {'1': 'approved'}))
+        loaded = store.load('token')
+        assert loaded.timestamp == 5 and loaded.statuses == {'1': 'approved'}
+
+    def test_empty_batch_and_delete(self):
+        store = StateStore()
+        store.save_many([])
+        store.save('token', state(1))
+        store.delete('token')
+        store.delete('missing')
+        assert store.load('token') is None
+
+    def test_reopen(self, path):
+        store = StateStore(path)
+        store.save('token', state(7, {'2': 'rejected'}))
+        store.close()
+        reopened = StateStore(path)
+        loaded = reopened.load('token')
+        assert loaded.timestamp == 7, 'Состояние должно переживать перезапуск.'
+        assert loaded.statuses == {'2': 'rejected'}
+        journal = reopened._connection.execute(
+            'PRAGMA journal_mode'
+        ).fetchone()[0]
+        assert journal == 'wal'
+        reopened.close()
+
+    def test_concurrent_writers(self, path):
+        stores = [StateStore(path) for _ in range(4)]
+        errors = []
+
+        def write(index, store):
+            try:
+                for number in range(25):
+                    store.save_many([
+                        (f'token-{index}-{number}', state(number)),
+                        ('shared', state(index)),
+                    ])
+            except Exception as error:
+                errors.append(error)
+
+        threads = [
+            threading.Thread(target=write, args=(index, store))
+            for index, store in enumerate(stores)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == [], 'Писатели не должны мешать друг другу.'
+        reader = StateStore(path)
+        rows = reader._connection.execute(
+            'SELECT COUNT(*) FROM subscribers'
+        ).fetchone()[0]
+        assert rows == 4 * 25 + 1
+        assert reader.load('shared').timestamp in range(4)
+        for store in stores + [reader]:
+            store.close()
+
+    def test_pending_is_taken_once(self, path):
+        outbox = Outbox()
+        for number in range(50):
+            outbox.put(Notification(number, f'сообщение {number}'))
+        StateStore(path).save_pending(outbox.pending())
+        stores = [StateStore(path) for _ in range(4)]
+        taken = []
+        threads = [
+            threading.Thread(target=lambda s=store: taken.extend(
+                s.take_pending()
+            ))
+            for store in stores
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(chat_id for chat_id, _, _ in taken) == list(range(50)), (
+            'Каждое сохранённое сообщение должно достаться одному экземпляру.'
+        )
+        for store in stores:
+            store.close()
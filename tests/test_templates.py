@@ -0,0 +1,60 @@
+import pytest
+
+from templates import MessageRenderer, escape_markdown_v2
+
+
+VERDICTS = {'approved': 'Работа проверена. Ура!'}
+
+
+class TestMessageRenderer:
+
+    def test_plain_matches_previous_format(self):
+        renderer = MessageRenderer(verdicts=VERDICTS)
+        assert renderer.status('hw <1>.zip', 'approved') == (
+            'Изменился статус проверки работы "hw <1>.zip". '
+            'Работа проверена. Ура!'
+        )
+
+    def test_html_escapes_values(self):
+        renderer = MessageRenderer(parse_mode='HTML', verdicts=VERDICTS)
+        assert renderer.status('hw <1> & 2', 'approved') == (
+            'Изменился статус проверки работы "<b>hw &lt;1&gt; &amp; 2</b>". '
+            'Работа проверена. Ура!'
+        )
+
+    def test_markdown_v2_escapes_text_and_values(self):
+        renderer = MessageRenderer(
+            parse_mode='MarkdownV2', verdicts=VERDICTS
+        )
+        assert renderer.status('hw_1.zip', 'approved') == (
+            'Изменился статус проверки работы "*hw\\_1\\.zip*"\\. '
+            'Работа проверена\\. Ура\\!'
+        ), 'В MarkdownV2 экранируются и шаблон, и подставленные значения.'
+
+    def test_escape_markdown_v2(self):
+        assert escape_markdown_v2('a*b[c](d)') == 'a\\*b\\[c\\]\\(d\\)'
+
+    def test_locale_overrides_verdicts(self):
+        renderer = MessageRenderer('en', verdicts=VERDICTS)
+        assert renderer.status('hw', 'approved').endswith('Hooray!')
+        assert renderer.error('api_error', 'timeout') == (
+            'API problem: timeout.'
+        )
+
+    def test_unknown_locale_and_mode(self):
+        with pytest.raises(ValueError):
+            MessageRenderer('xx')
+        with pytest.raises(ValueError):
+            MessageRenderer(parse_mode='BBCode')
+
+    def test_repeated_messages_are_cached(self):
+        renderer = MessageRenderer(verdicts=VERDICTS, cache_size=2)
+        for _ in range(100):
+            renderer.error('error', 'timeout')
+        info = renderer.cache_info()
+        assert info.misses == 1 and info.hits == 99
+        renderer.error('error', 'a')
+        renderer.error('error', 'b')
+        assert renderer.cache_info().currsize == 2, (
+            'Кеш отрисовки должен быть ограничен.'
+        )
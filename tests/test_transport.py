@@ -0,0 +1,148 @@
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import exceptions as ex
+import transport
+from breaker import CircuitBreaker
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    status = HTTPStatus.OK
+    headers_to_send = {}
+
+    def do_GET(self):
+        body = b'{}'
+        self.send_response(self.status)
+        for name, value in self.headers_to_send.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, args=(0.05,), daemon=True
+    ).start()
+    host, port = server.server_address
+    yield f'http://{host}:{port}/api'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_transport():
+    yield
+    transport.configure(0, None)
+    KeepAliveHandler.status = HTTPStatus.OK
+    KeepAliveHandler.headers_to_send = {}
+
+
+class FakeLimiter:
+
+    def __init__(self):
+        self.acquired = []
+        self.paused = []
+
+    def acquire(self, url):
+        self.acquired.append(url)
+
+    def pause(self, url, delay):
+        self.paused.append((url, delay))
+
+
+class TestHttpPool:
+
+    def test_pool_size(self):
+        pool = transport.configure(4, 10)
+        assert pool.adapter._pool_maxsize == 4
+        assert pool.adapter._pool_block
+
+    def test_connection_is_reused(self, server):
+        transport.configure(2, 5)
+        for _ in range(3):
+            assert transport.get(server).status_code == HTTPStatus.OK
+        stats = transport.stats()
+        assert stats == {'requests': 3, 'misses': 1, 'hits': 2}, (
+            'Повторные запросы должны идти по открытому соединению.'
+        )
+
+    def test_without_pool(self, server, monkeypatch):
+        assert transport.configure(0, 7) is None
+        calls = []
+
+        def get(url, **kwargs):
+            calls.append(kwargs)
+            return requests.Response()
+
+        monkeypatch.setattr(requests, 'get', get)
+        transport.get(server)
+        assert calls == [{'timeout': 7}]
+        assert transport.stats()['requests'] == 0
+
+    def test_close(self):
+        pool = transport.configure(2, 5)
+        closed = []
+        pool.session.close = lambda: closed.append(True)
+        transport.configure(2, 5)
+        assert closed == [True], 'Повторная настройка закрывает старый пул.'
+        transport.close()
+        transport.close()
+        assert transport.stats()['requests'] == 0
+
+
+class TestLimiterAndBreaker:
+
+    def test_limiter_waits_and_pauses_on_429(self, server):
+        limiter = FakeLimiter()
+        transport.configure(1, 5, limiter=limiter)
+        KeepAliveHandler.status = HTTPStatus.TOO_MANY_REQUESTS
+        KeepAliveHandler.headers_to_send = {'Retry-After': '3'}
+        transport.get(server)
+        assert limiter.acquired == [server]
+        assert limiter.paused == [(server, 3.0)]
+
+    def test_breaker_counts_server_errors(self, server):
+        breaker = CircuitBreaker(failure_threshold=2)
+        transport.configure(1, 5, breaker=breaker)
+        KeepAliveHandler.status = HTTPStatus.BAD_GATEWAY
+        transport.get(server)
+        transport.get(server)
+        assert breaker.state == 'open'
+        with pytest.raises(ex.CircuitOpenException):
+            transport.get(server)
+
+    def test_breaker_counts_network_errors(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        transport.configure(1, 1, breaker=breaker)
+        with pytest.raises(requests.RequestException):
+            transport.get('http://127.0.0.1:9/unreachable')
+        assert breaker.failures == 1
+
+    def test_success_resets_breaker(self, server):
+        breaker = CircuitBreaker(failure_threshold=3)
+        breaker.record_failure()
+        transport.configure(1, 5, breaker=breaker)
+        transport.get(server)
+        assert breaker.failures == 0
+
+    @pytest.mark.parametrize('value, expected', [
+        ('5', 5.0), ('-1', 0), ('soon', transport.DEFAULT_RETRY_AFTER),
+        (None, transport.DEFAULT_RETRY_AFTER),
+    ])
+    def test_retry_after(self, value, expected):
+        response = requests.Response()
+        if value is not None:
+            response.headers['Retry-After'] = value
+        assert transport.retry_after(response) == expected
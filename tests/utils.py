@@ -101,5 +101,15 @@ class MockTelegramBot:
         self.text = text
 
 
+class FakeClock:
+    """Часы для тестов: время меняется только присваиванием now."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
 class BreakInfiniteLoop(Exception):
     pass
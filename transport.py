@@ -0,0 +1,143 @@
+from http import HTTPStatus
+
+import exceptions as ex
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_RETRY_AFTER = 1
+
+
+class HttpPool:
+    """
+    Общая сессия requests с пулом keep-alive соединений.
+    Повторные запросы к одному хосту переиспользуют TCP/TLS-соединение.
+    """
+
+    def __init__(self, pool_size, timeout):
+        self.timeout = timeout
+        self.adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+    def get(self, url, **kwargs):
+        """GET-запрос через пул соединений."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def stats(self):
+        """
+        Счётчики пула.
+        Запросы, новые соединения (промахи) и запросы по уже
+        открытым соединениям (попадания).
+        """
+        pools = self.adapter.poolmanager.pools
+        requests_count = 0
+        connections = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_count += pool.num_requests
+            connections += pool.num_connections
+        return {
+            'requests': requests_count,
+            'misses': connections,
+            'hits': max(0, requests_count - connections),
+        }
+
+    def close(self):
+        """Закрывает все соединения пула."""
+        self.session.close()
+
+
+_pool = None
+_timeout = None
+_limiter = None
+_breaker = None
+
+
+def configure(pool_size, timeout, limiter=None, breaker=None):
+    """
+    Настраивает общий пул, ограничитель частоты и предохранитель.
+    При pool_size == 0 запросы идут через requests.get без пула.
+    """
+    global _pool, _timeout, _limiter, _breaker
+    close()
+    _timeout = timeout
+    _limiter = limiter
+    _breaker = breaker
+    if pool_size > 0:
+        _pool = HttpPool(pool_size, timeout)
+    return _pool
+
+
+def retry_after(response):
+    """Пауза из заголовка Retry-After в секундах."""
+    value = getattr(response, 'headers', {}).get('Retry-After')
+    try:
+        return max(0, float(value))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def _send(url, **kwargs):
+    if _pool is not None:
+        return _pool.get(url, **kwargs)
+    if _timeout is not None:
+        kwargs.setdefault('timeout', _timeout)
+    return requests.get(url, **kwargs)
+
+
+def _record(url, response):
+    too_many = response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    if too_many and _limiter is not None:
+        _limiter.pause(url, retry_after(response))
+    if _breaker is None:
+        return
+    if too_many or response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        _breaker.record_failure()
+    else:
+        _breaker.record_success()
+
+
+def get(url, **kwargs):
+    """
+    GET-запрос через общий пул или напрямую, если пул не настроен.
+    Перед запросом ждёт разрешения ограничителя, ответ 429
+    приостанавливает запросы к хосту на время из Retry-After.
+    Сетевые ошибки, 429 и 5xx считаются отказами для предохранителя.
+    """
+    if _breaker is not None and not _breaker.allow():
+        raise ex.CircuitOpenException(
+            f'Запросы к API приостановлены на {_breaker.retry_in()} с.'
+        )
+    if _limiter is not None:
+        _limiter.acquire(url)
+    try:
+        response = _send(url, **kwargs)
+    except requests.RequestException:
+        if _breaker is not None:
+            _breaker.record_failure()
+        raise
+    _record(url, response)
+    return response
+
+
+def stats():
+    """Счётчики общего пула, если он настроен."""
+    if _pool is None:
+        return {'requests': 0, 'misses': 0, 'hits': 0}
+    return _pool.stats()
+
+
+def close():
+    """Закрывает общий пул соединений."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None